@@ -3,12 +3,15 @@
 Medical Research Paper Summarizer - Command Line Interface
 """
 import argparse
+import asyncio
+import functools
 import sys
 import logging
 from pathlib import Path
+from typing import Optional
 
-from summarization.summarizer import MedicalPaperSummarizer
-from config import settings
+# Heavy imports (config, summarizer and its PDF/LLM dependencies) are
+# deferred into main() so --help and argument errors return immediately.
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,8 +20,69 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Main CLI entry point."""
+@functools.lru_cache(maxsize=None)
+def _settings():
+    """Load application settings on first use (keeps config off the --help path)."""
+    from config import settings
+    return settings
+
+
+@functools.lru_cache(maxsize=1)
+def _get_summarizer(model, fallback_model, chunk_size, chunk_overlap, marshal_k, use_cache):
+    """
+    Build the summarizer once per configuration.
+    
+    Repeated main() calls in one process (e.g. batch drivers) reuse the same
+    LLM clients, and with them their pooled HTTP connections.
+    """
+    from summarization.summarizer import MedicalPaperSummarizer
+    return MedicalPaperSummarizer(
+        primary_model=model,
+        fallback_model=fallback_model,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        marshal_k=marshal_k,
+        use_cache=use_cache
+    )
+
+
+def _sniff_file_type(file_path: str) -> Optional[str]:
+    """
+    Detect PDF or XML from the file header, so renamed files still work.
+    
+    Args:
+        file_path: Path to input file
+        
+    Returns:
+        'pdf', 'xml', or None if neither
+        
+    Raises:
+        OSError: If the file cannot be opened
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(1024)
+    
+    if header.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'<'):
+        return 'xml'
+    # Readers accept the PDF header anywhere in the first 1024 bytes
+    if b'%PDF-' in header:
+        return 'pdf'
+    return None
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser once per process (reused by repeated main() calls)."""
     parser = argparse.ArgumentParser(
         description="Summarize medical research papers using LLMs",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -66,28 +130,48 @@ Examples:
         '--model',
         type=str,
         default=None,
-        help=f'LLM model to use (default: {settings.primary_model})'
+        help='LLM model to use (default: PRIMARY_MODEL setting)'
     )
     
     parser.add_argument(
         '--fallback-model',
         type=str,
         default=None,
-        help=f'Fallback model (default: {settings.fallback_model})'
+        help='Fallback model (default: FALLBACK_MODEL setting)'
     )
     
     parser.add_argument(
         '--chunk-size',
         type=int,
         default=None,
-        help=f'Chunk size in tokens (default: {settings.chunk_size})'
+        help='Chunk size in tokens (default: CHUNK_SIZE setting)'
     )
     
     parser.add_argument(
         '--chunk-overlap',
         type=int,
         default=None,
-        help=f'Chunk overlap in tokens (default: {settings.chunk_overlap})'
+        help='Chunk overlap in tokens (default: CHUNK_OVERLAP setting)'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=_positive_int,
+        default=4,
+        help='Maximum concurrent LLM requests; 1 runs sequentially (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--marshal-k',
+        type=_positive_int,
+        default=3,
+        help='Chunks packed into each summarization request; 1 disables packing (default: 3)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the on-disk LLM response cache'
     )
     
     parser.add_argument(
@@ -103,63 +187,86 @@ Examples:
         help='Enable verbose logging'
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """Main CLI entry point."""
+    args = _build_parser().parse_args()
     
     # Configure logging
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    # Validate input file
-    input_path = Path(args.input_file)
-    if not input_path.exists():
+    # Validate input file by its content, not its name
+    try:
+        file_type = _sniff_file_type(args.input_file)
+    except OSError:
         logger.error(f"Input file not found: {args.input_file}")
         sys.exit(1)
     
-    if input_path.suffix.lower() not in ['.pdf', '.xml']:
-        logger.error(f"Unsupported file format: {input_path.suffix}")
-        logger.error("Supported formats: .pdf, .xml")
+    if file_type is None:
+        logger.error(f"Unsupported file format: {args.input_file}")
+        logger.error("Supported formats: PDF, XML")
         sys.exit(1)
     
     # Check API keys
+    settings = _settings()
     if not settings.anthropic_api_key and not settings.openai_api_key:
         logger.error("No API keys configured!")
         logger.error("Set ANTHROPIC_API_KEY or OPENAI_API_KEY in .env file")
         sys.exit(1)
     
+    # Resolve defaults that --help only names
+    args.model = args.model or settings.primary_model
+    args.fallback_model = args.fallback_model or settings.fallback_model
+    args.chunk_size = args.chunk_size or settings.chunk_size
+    args.chunk_overlap = args.chunk_overlap or settings.chunk_overlap
+    
     try:
         # Initialize summarizer
         logger.info("Initializing summarizer...")
-        summarizer = MedicalPaperSummarizer(
-            primary_model=args.model,
-            fallback_model=args.fallback_model,
-            chunk_size=args.chunk_size,
-            chunk_overlap=args.chunk_overlap
+        summarizer = _get_summarizer(
+            args.model,
+            args.fallback_model,
+            args.chunk_size,
+            args.chunk_overlap,
+            args.marshal_k,
+            not args.no_cache
         )
         
         # Summarize
         logger.info(f"Processing: {args.input_file}")
-        summary = summarizer.summarize(
+        summary = asyncio.run(summarizer.summarize_async(
             file_path=args.input_file,
-            title=args.title
-        )
+            title=args.title,
+            concurrency=args.concurrency,
+            file_type=file_type
+        ))
         
-        # Format output
+        # Format output (markdown is streamed piece by piece)
         if args.format == 'json':
-            output_text = summary.model_dump_json(indent=2)
+            pieces = [summary.model_dump_json(indent=2)]
         else:
-            output_text = summary.to_markdown()
+            pieces = summary.iter_markdown()
         
         # Save or print
         if args.output:
             output_path = Path(args.output)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(output_text, encoding='utf-8')
+            with output_path.open('wb') as f:
+                for piece in pieces:
+                    f.write(piece.encode('utf-8'))
             logger.info(f"Summary saved to: {args.output}")
         else:
-            print("\n" + "="*80)
-            print("SUMMARY")
-            print("="*80 + "\n")
-            print(output_text)
+            banner = "="*80
+            sys.stdout.flush()
+            out = sys.stdout.buffer
+            out.write(f"\n{banner}\nSUMMARY\n{banner}\n\n".encode('utf-8'))
+            for piece in pieces:
+                out.write(piece.encode('utf-8'))
+            out.write(b"\n")
+            out.flush()
         
         logger.info("✓ Summarization complete!")
         
@@ -80,6 +80,12 @@ class Settings(BaseSettings):
         le=10.0,
         description="Delay between API calls in seconds"
     )
+    max_retry_delay: float = Field(
+        default=60.0,
+        ge=1.0,
+        le=600.0,
+        description="Longest wait before a retry in seconds (caps Retry-After)"
+    )
     
     @field_validator("chunk_overlap")
     @classmethod
@@ -0,0 +1,122 @@
+"""
+Batch document loader: extract many PDF/XML files over one worker pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+import logging
+
+from ingestion.pdf_loader import PDFLoader
+from ingestion.workers import MP_CONTEXT, prefetch
+from ingestion.xml_loader import XMLLoader
+
+logger = logging.getLogger(__name__)
+
+_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Per-process loaders, created on first use in each worker. Documents are
+# already spread across processes, so page-level fan-out is disabled.
+_pdf_loader: Optional[PDFLoader] = None
+_xml_loader: Optional[XMLLoader] = None
+
+
+def _load_one(path: str) -> Union[str, Exception]:
+    """Worker: extract one document, returning the error instead of raising."""
+    global _pdf_loader, _xml_loader
+    try:
+        if Path(path).suffix.lower() == '.xml':
+            if _xml_loader is None:
+                _xml_loader = XMLLoader()
+            return _xml_loader.load(path)
+        if _pdf_loader is None:
+            _pdf_loader = PDFLoader(use_pymupdf=True, max_workers=1)
+        return _pdf_loader.load(path)
+    except Exception as e:
+        return e
+
+
+class BatchLoader:
+    """
+    Extract text from many documents with a persistent process pool.
+    
+    The pool is started on first use and reused across load_many() calls,
+    so callers pay process start-up once per batch job rather than per file.
+    Use as a context manager (or call close()) to shut the workers down.
+    """
+    
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Initialize batch loader.
+        
+        Args:
+            workers: Worker processes (default: CPU count, capped at 8);
+                1 loads in the calling process without a pool
+        """
+        self.workers = max(1, workers) if workers else _MAX_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def load_many(
+        self,
+        paths: List[str],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[str, Union[str, Exception]]]:
+        """
+        Load PDF and XML files, yielding results in input order.
+        
+        Files are dispatched by suffix ('.xml' to XMLLoader, anything else to
+        PDFLoader). A failing file does not stop the batch: its exception
+        is yielded in place of the text.
+        
+        Args:
+            paths: Paths to PDF/XML files
+            progress: Optional callback called as progress(done, total)
+                after each file
+                
+        Yields:
+            (path, extracted text or the exception raised for that file)
+        """
+        paths = list(paths)
+        total = len(paths)
+        
+        if self.workers == 1 or total <= 1:
+            results = self._load_serial(paths)
+        else:
+            # A few chunks per worker: amortises IPC without leaving workers
+            # idle behind one slow chunk at the end
+            chunksize = max(1, total // (4 * self.workers))
+            results = self._get_executor().map(_load_one, paths, chunksize=chunksize)
+        
+        for done, (path, result) in enumerate(zip(paths, results), 1):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to load {path}: {result}")
+            if progress is not None:
+                progress(done, total)
+            yield path, result
+    
+    def _load_serial(self, paths: List[str]) -> Iterator[Union[str, Exception]]:
+        """Load in this process, prefetching each next file from disk."""
+        for i, path in enumerate(paths):
+            if i + 1 < len(paths):
+                prefetch(paths[i + 1])
+            yield _load_one(path)
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=MP_CONTEXT
+            )
+        return self._executor
+    
+    def close(self) -> None:
+        """Shut down the worker pool, if started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def __enter__(self) -> "BatchLoader":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
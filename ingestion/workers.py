@@ -0,0 +1,61 @@
+"""
+Process pools and file read-ahead shared by the loaders and the section parser.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+# Workers start from a clean server process rather than by forking the
+# caller, which may be a multi-threaded web server (forking with other
+# threads running can deadlock the child)
+MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Pools shared by all callers in this process, one per worker count,
+# started on first use so each document skips worker start-up
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def shared_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the process-wide pool with this many workers, starting it if needed."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=MP_CONTEXT
+            )
+        return pool
+
+
+def discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next caller starts a fresh one."""
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False)
+
+
+def prefetch(path: str) -> None:
+    """
+    Ask the kernel to start reading a file into the page cache.
+    
+    Returns immediately; the read-ahead overlaps with whatever the caller
+    does next. A no-op where posix_fadvise is unavailable or the file
+    can't be opened (the subsequent load reports the real error).
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
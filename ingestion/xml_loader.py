@@ -1,13 +1,53 @@
 """
 XML document loader for PubMed Central articles.
 """
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from lxml import etree
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Precompiled queries (evaluated by libxml2, reused across documents)
+_PARAGRAPH_TEXT = etree.XPath(
+    './/text()[not(ancestor::xref or ancestor::fig or ancestor::table-wrap)]'
+)
+_SECTION_TITLE_TEXT = etree.XPath('.//text()[not(ancestor::title)]')
+_AUTHOR_CONTRIBS = etree.XPath('.//contrib[@contrib-type="author"]')
+
+# Elements the streaming parser stops at; everything else is only built as
+# part of one of these subtrees (or of a top-level element being discarded)
+_STREAM_TAGS = (
+    'article-title', 'title-group', 'abstract', 'body', 'contrib-group',
+    'journal-title', 'pub-date', 'article-id', 'kwd',
+    'front', 'back', 'floats-group', 'sub-article', 'ref',
+)
+# Of those, the ones where only the first occurrence matters
+_FIRST_ONLY = frozenset(
+    ('article-title', 'title-group', 'abstract', 'body', 'contrib-group',
+     'journal-title', 'pub-date')
+)
+
+
+def _normalize(strings) -> str:
+    """Join text nodes and collapse runs of whitespace to single spaces."""
+    return ' '.join(''.join(strings).split())
+
+
+def _text(element) -> str:
+    """Whitespace-normalized text content of an element."""
+    if len(element) == 0:
+        # Leaf fields (surname, year, article-id, most kwd) have no child
+        # markup: read .text directly instead of starting an itertext walk
+        text = element.text
+        return ' '.join(text.split()) if text else ''
+    return _normalize(element.itertext())
+
+
+def _first(root, tag: str):
+    """First element with the given tag in document order, or None."""
+    return next(root.iter(tag), None)
+
 
 class XMLLoader:
     """Extract text from PubMed Central XML files."""
@@ -22,6 +62,22 @@ class XMLLoader:
         Returns:
             Extracted text with section structure
             
+        Raises:
+            FileNotFoundError: If XML doesn't exist
+            ValueError: If XML is malformed
+        """
+        return self.load_with_metadata(xml_path)[0]
+    
+    def load_with_metadata(self, xml_path: str) -> Tuple[str, Dict[str, any]]:
+        """
+        Extract text and metadata in a single streaming pass.
+        
+        Args:
+            xml_path: Path to XML file
+            
+        Returns:
+            Tuple of (extracted text, metadata dictionary)
+            
         Raises:
             FileNotFoundError: If XML doesn't exist
             ValueError: If XML is malformed
@@ -30,86 +86,110 @@ class XMLLoader:
         if not path.exists():
             raise FileNotFoundError(f"XML not found: {xml_path}")
         
+        found = {}
         try:
-            with open(xml_path, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f, 'lxml-xml')
-            
-            return self._extract_structured_text(soup)
+            self._stream(xml_path, found)
         except Exception as e:
             logger.error(f"Error parsing XML {xml_path}: {e}")
             raise ValueError(f"Failed to parse XML: {e}")
+        
+        return self._structured_text(found), self._metadata(found)
+    
+    def _stream(self, xml_path: str, found: dict) -> None:
+        """
+        Parse the document once, recording each needed piece as it completes.
+        
+        Values are computed at each element's end event; top-level elements
+        and reference entries are then discarded, so memory is bounded by
+        the largest top-level part (usually the body) rather than the whole
+        document with its reference list.
+        """
+        context = etree.iterparse(
+            xml_path, events=('end',), tag=_STREAM_TAGS,
+            resolve_entities=False, no_network=True
+        )
+        keywords = found.setdefault('keywords', [])
+        article_ids = found.setdefault('article_ids', {})
+        
+        for _, elem in context:
+            tag = elem.tag
+            if tag in _FIRST_ONLY:
+                if tag not in found:
+                    found[tag] = self._extract_element(tag, elem)
+            elif tag == 'kwd':
+                keywords.append(_text(elem))
+            elif tag == 'article-id':
+                article_ids.setdefault(elem.get('pub-id-type'), _text(elem))
+            
+            parent = elem.getparent()
+            if tag == 'ref' or (parent is not None and parent.getparent() is None):
+                # Done with this subtree: free it and any finished siblings
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del parent[0]
     
-    def _extract_structured_text(self, soup: BeautifulSoup) -> str:
-        """Extract text preserving section structure."""
+    def _extract_element(self, tag: str, elem):
+        """Compute the value kept for a first-occurrence element."""
+        if tag == 'abstract':
+            return self._extract_abstract(elem)
+        if tag == 'body':
+            return self._extract_body(elem)
+        if tag == 'contrib-group':
+            return self._extract_authors(elem)
+        if tag == 'pub-date':
+            return self._extract_pub_date(elem)
+        return _text(elem)
+    
+    def _structured_text(self, found: dict) -> str:
+        """Assemble extracted text preserving section structure."""
         parts = []
         
         # Extract title
-        title = self._extract_title(soup)
+        title = self._title(found)
         if title:
             parts.append(f"TITLE: {title}\n")
         
         # Extract abstract
-        abstract = self._extract_abstract(soup)
+        abstract = found.get('abstract')
         if abstract:
             parts.append(f"ABSTRACT\n{abstract}\n")
         
         # Extract body sections
-        body_text = self._extract_body(soup)
+        body_text = found.get('body')
         if body_text:
             parts.append(body_text)
         
         return "\n\n".join(parts)
     
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract article title."""
-        # Try article-title first
-        title_tag = soup.find('article-title')
-        if title_tag:
-            return title_tag.get_text(strip=True)
-        
-        # Fallback to title-group
-        title_group = soup.find('title-group')
-        if title_group:
-            return title_group.get_text(strip=True)
-        
-        return None
+    def _title(self, found: dict) -> Optional[str]:
+        """Article title, falling back to the whole title-group."""
+        if 'article-title' in found:
+            return found['article-title']
+        return found.get('title-group')
     
-    def _extract_abstract(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_abstract(self, abstract_tag) -> Optional[str]:
         """Extract abstract."""
-        abstract_tag = soup.find('abstract')
-        if not abstract_tag:
-            return None
-        
         # Handle structured abstracts
-        sections = abstract_tag.find_all('sec')
+        sections = list(abstract_tag.iter('sec'))
         if sections:
             abstract_parts = []
             for sec in sections:
-                title = sec.find('title')
-                if title:
-                    abstract_parts.append(f"{title.get_text(strip=True)}: ")
+                title = _first(sec, 'title')
+                if title is not None:
+                    abstract_parts.append(f"{_text(title)}: ")
                 
-                # Get text excluding nested tags
-                for title in sec.find_all('title'):
-                    title.decompose()
-                
-                abstract_parts.append(sec.get_text(strip=True))
+                # Get text excluding section titles
+                abstract_parts.append(_normalize(_SECTION_TITLE_TEXT(sec)))
             
             return ' '.join(abstract_parts)
         else:
             # Unstructured abstract
-            return abstract_tag.get_text(strip=True)
+            return _text(abstract_tag)
     
-    def _extract_body(self, soup: BeautifulSoup) -> str:
+    def _extract_body(self, body) -> str:
         """Extract body with section headers."""
-        body = soup.find('body')
-        if not body:
-            return ""
-        
         parts = []
-        sections = body.find_all('sec', recursive=False)
-        
-        for sec in sections:
+        for sec in body.iterchildren('sec'):
             section_text = self._extract_section(sec)
             if section_text:
                 parts.append(section_text)
@@ -120,26 +200,30 @@ class XMLLoader:
         """Recursively extract section with subsections."""
         parts = []
         
+        # Split direct children in one pass: title, then paragraphs, then
+        # subsections (the output order regardless of document order)
+        title_tag = None
+        paragraphs = []
+        subsections = []
+        for child in section_tag.iterchildren('title', 'p', 'sec'):
+            if child.tag == 'p':
+                paragraphs.append(child)
+            elif child.tag == 'sec':
+                subsections.append(child)
+            elif title_tag is None:
+                title_tag = child
+        
         # Get section title
-        title_tag = section_tag.find('title', recursive=False)
-        if title_tag:
-            title = title_tag.get_text(strip=True).upper()
-            parts.append(f"{title}\n")
-            title_tag.decompose()  # Remove from tree
-        
-        # Get section paragraphs (non-recursive)
-        paragraphs = section_tag.find_all('p', recursive=False)
+        if title_tag is not None:
+            parts.append(f"{_text(title_tag).upper()}\n")
+        
+        # Get section paragraphs, skipping references, figures and tables
         for p in paragraphs:
-            # Remove references, figures, tables
-            for unwanted in p.find_all(['xref', 'fig', 'table-wrap']):
-                unwanted.decompose()
-            
-            text = p.get_text(strip=True)
+            text = _normalize(_PARAGRAPH_TEXT(p))
             if text:
                 parts.append(text)
         
         # Get subsections
-        subsections = section_tag.find_all('sec', recursive=False)
         for subsec in subsections:
             subsec_text = self._extract_section(subsec, level + 1)
             if subsec_text:
@@ -157,80 +241,72 @@ class XMLLoader:
         Returns:
             Dictionary with metadata
         """
-        metadata = {}
+        found = {}
         
         try:
-            with open(xml_path, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f, 'lxml-xml')
-            
-            # Title
-            metadata['title'] = self._extract_title(soup)
-            
-            # Authors
-            metadata['authors'] = self._extract_authors(soup)
-            
-            # Journal
-            journal = soup.find('journal-title')
-            if journal:
-                metadata['journal'] = journal.get_text(strip=True)
-            
-            # Publication date
-            pub_date = soup.find('pub-date')
-            if pub_date:
-                year = pub_date.find('year')
-                month = pub_date.find('month')
-                day = pub_date.find('day')
-                
-                date_parts = []
-                if year:
-                    date_parts.append(year.get_text(strip=True))
-                if month:
-                    date_parts.append(month.get_text(strip=True))
-                if day:
-                    date_parts.append(day.get_text(strip=True))
-                
-                metadata['publication_date'] = '-'.join(date_parts)
-            
-            # DOI
-            doi = soup.find('article-id', {'pub-id-type': 'doi'})
-            if doi:
-                metadata['doi'] = doi.get_text(strip=True)
-            
-            # PMC ID
-            pmc_id = soup.find('article-id', {'pub-id-type': 'pmc'})
-            if pmc_id:
-                metadata['pmc_id'] = pmc_id.get_text(strip=True)
-            
-            # Keywords
-            keywords = soup.find_all('kwd')
-            if keywords:
-                metadata['keywords'] = [kwd.get_text(strip=True) for kwd in keywords]
-        
+            self._stream(xml_path, found)
         except Exception as e:
             logger.warning(f"Error extracting metadata: {e}")
         
+        return self._metadata(found)
+    
+    def _metadata(self, found: dict) -> Dict[str, any]:
+        """Build the metadata dictionary from streamed values."""
+        metadata = {}
+        
+        # Title
+        metadata['title'] = self._title(found)
+        
+        # Authors
+        metadata['authors'] = found.get('contrib-group', [])
+        
+        # Journal
+        if 'journal-title' in found:
+            metadata['journal'] = found['journal-title']
+        
+        # Publication date
+        if 'pub-date' in found:
+            metadata['publication_date'] = found['pub-date']
+        
+        # DOI and PMC ID
+        article_ids = found.get('article_ids', {})
+        if 'doi' in article_ids:
+            metadata['doi'] = article_ids['doi']
+        if 'pmc' in article_ids:
+            metadata['pmc_id'] = article_ids['pmc']
+        
+        # Keywords
+        if found.get('keywords'):
+            metadata['keywords'] = found['keywords']
+        
         return metadata
     
-    def _extract_authors(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_pub_date(self, pub_date) -> str:
+        """Format a pub-date element as year-month-day (parts as present)."""
+        date_parts = []
+        for tag in ('year', 'month', 'day'):
+            part = _first(pub_date, tag)
+            if part is not None:
+                date_parts.append(_text(part))
+        
+        return '-'.join(date_parts)
+    
+    def _extract_authors(self, contrib_group) -> List[str]:
         """Extract author names."""
         authors = []
         
-        contrib_group = soup.find('contrib-group')
-        if contrib_group:
-            contribs = contrib_group.find_all('contrib', {'contrib-type': 'author'})
+        for contrib in _AUTHOR_CONTRIBS(contrib_group):
+            name_parts = []
             
-            for contrib in contribs:
-                name_parts = []
-                
-                surname = contrib.find('surname')
-                if surname:
-                    name_parts.append(surname.get_text(strip=True))
-                
-                given_names = contrib.find('given-names')
-                if given_names:
-                    name_parts.insert(0, given_names.get_text(strip=True))
-                
-                if name_parts:
-                    authors.append(' '.join(name_parts))
+            surname = _first(contrib, 'surname')
+            if surname is not None:
+                name_parts.append(_text(surname))
+            
+            given_names = _first(contrib, 'given-names')
+            if given_names is not None:
+                name_parts.insert(0, _text(given_names))
+            
+            if name_parts:
+                authors.append(' '.join(name_parts))
         
         return authors
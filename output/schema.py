@@ -1,9 +1,10 @@
 """
 Output schema for medical paper summaries.
 """
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
+from typing import Iterable, Iterator, List, Optional, Literal, Tuple
 from datetime import datetime
+from functools import cached_property
 
 
 class PaperSummary(BaseModel):
@@ -48,54 +49,90 @@ class PaperSummary(BaseModel):
         description="Required safety disclaimer"
     )
     
+    # Pipeline steps that fell back to placeholder output; kept out of the
+    # serialized summary
+    _failed_steps: Tuple[str, ...] = PrivateAttr(default=())
+    
+    @property
+    def failed_steps(self) -> Tuple[str, ...]:
+        """Sections, extracted fields or 'keywords' whose LLM call failed."""
+        return self._failed_steps
+    
+    def mark_failed_steps(self, steps: Iterable[str]) -> None:
+        """Record steps that fell back to placeholder output (see failed_steps)."""
+        self._failed_steps = tuple(steps)
+    
     @field_validator("key_findings")
     @classmethod
     def validate_findings(cls, v: List[str]) -> List[str]:
         """Ensure findings are non-empty."""
-        if not v or all(not f.strip() for f in v):
+        # Empty lists never get here (min_length is checked by pydantic-core);
+        # strip each finding once and reject if nothing is left
+        findings = [f for f in map(str.strip, v) if f]
+        if not findings:
             raise ValueError("key_findings must contain at least one non-empty finding")
-        return [f.strip() for f in v if f.strip()]
+        return findings
     
     @field_validator("keywords")
     @classmethod
     def validate_keywords(cls, v: List[str]) -> List[str]:
         """Clean and deduplicate keywords."""
-        cleaned = [k.strip().lower() for k in v if k.strip()]
-        return list(dict.fromkeys(cleaned))  # Preserve order while deduplicating
+        # Preserve order while deduplicating
+        return list(dict.fromkeys(k.lower() for k in map(str.strip, v) if k))
     
-    def to_markdown(self) -> str:
-        """Convert summary to formatted markdown."""
-        md = f"""# {self.title}
+    def iter_markdown(self) -> Iterator[str]:
+        """Yield the markdown rendering section by section (for streaming writes)."""
+        yield f"""# {self.title}
 
 ## Key Findings
 """
-        for i, finding in enumerate(self.key_findings, 1):
-            md += f"{i}. {finding}\n"
+        yield "".join(
+            f"{i}. {finding}\n" for i, finding in enumerate(self.key_findings, 1)
+        )
         
         if self.limitations:
-            md += "\n## Limitations\n"
-            for i, limitation in enumerate(self.limitations, 1):
-                md += f"{i}. {limitation}\n"
+            yield "\n## Limitations\n" + "".join(
+                f"{i}. {limitation}\n"
+                for i, limitation in enumerate(self.limitations, 1)
+            )
         
-        md += f"""
+        keywords = ", ".join(self.keywords)
+        generated = self.summary_timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        yield f"""
 ## Author Conclusions
 {self.author_conclusions}
 
 ## Keywords
-{", ".join(self.keywords)}
+{keywords}
 
 ---
 
-**Summary Generated:** {self.summary_timestamp.strftime("%Y-%m-%d %H:%M:%S")}
+**Summary Generated:** {generated}
 **Model:** {self.model_used}
 
 ⚠️ **{self.safety_disclaimer}**
 """
-        return md
     
-    class Config:
-        """Pydantic configuration."""
-        json_schema_extra = {
+    @cached_property
+    def markdown(self) -> str:
+        """Formatted markdown, rendered once (the model is frozen)."""
+        return "".join(self.iter_markdown())
+    
+    def to_markdown(self) -> str:
+        """Convert summary to formatted markdown."""
+        return self.markdown
+    
+    def model_copy(self, *, update: Optional[dict] = None, deep: bool = False) -> "PaperSummary":
+        """Copy the summary; the copy renders its own markdown (update may change it)."""
+        copy = super().model_copy(update=update, deep=deep)
+        # cached_property stores in __dict__, which the copy starts from
+        copy.__dict__.pop('markdown', None)
+        return copy
+    
+    model_config = ConfigDict(
+        # Summaries are never modified after construction
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "title": "Efficacy of Drug X in Type 2 Diabetes: A Randomized Controlled Trial",
                 "key_findings": [
@@ -112,3 +149,4 @@ class PaperSummary(BaseModel):
                 "keywords": ["type 2 diabetes", "HbA1c", "randomized controlled trial", "drug x", "glycemic control"]
             }
         }
+    )
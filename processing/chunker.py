@@ -1,14 +1,70 @@
 """
 Text chunking with overlap for LLM processing.
 """
+import functools
 import tiktoken
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
+try:
+    import riptoken  # tiktoken-compatible, byte-identical, faster BPE (optional)
+except ImportError:
+    riptoken = None
+
 logger = logging.getLogger(__name__)
 
+TOKENIZER_BACKENDS = ("auto", "tiktoken", "riptoken")
+
+# Sentence boundary: . ! ? followed by space and capital letter
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+_SUBSENT_RE = re.compile(r'[;,]\s+')
+
+# Characters of text encoded per requested token when truncating long input;
+# English prose averages ~4, so this leaves room for token-dense text
+_TRUNCATE_CHARS_PER_TOKEN = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str, backend: str):
+    """
+    Load a BPE encoding from the selected tokenizer backend.
+    
+    'auto' prefers riptoken when installed (same token ids, faster encode)
+    and otherwise uses tiktoken. Memoized, so every TextChunker in the
+    process shares one encoder whichever backend provides it.
+    """
+    if backend == "riptoken" or (backend == "auto" and riptoken is not None):
+        if riptoken is None:
+            raise ImportError("Tokenizer backend 'riptoken' is not installed")
+        return riptoken.get_encoding(encoding_name)
+    return tiktoken.get_encoding(encoding_name)
+
+
+def _fits_unencoded(text: str, max_tokens: float) -> bool:
+    """Whether text is short enough to be within max_tokens without encoding."""
+    # Every token covers at least one UTF-8 byte (at most 4 per character)
+    return len(text) * 4 <= max_tokens or (len(text) <= max_tokens and text.isascii())
+
+
+def _prefix_cut(text: str, max_tokens: float) -> int:
+    """
+    End of a prefix of long text that is enough to reach max_tokens tokens.
+    
+    The cut is at a space following a non-space: the tokenizer's pre-split
+    always starts a new piece there, so the prefix encodes to exactly the
+    leading tokens of the full text. Returns 0 if the text is not long
+    enough to bother (or has no such space).
+    """
+    limit = int(max_tokens * _TRUNCATE_CHARS_PER_TOKEN)
+    if len(text) <= limit:
+        return 0
+    cut = text.rfind(' ', 0, limit)
+    while cut > 0 and text[cut - 1].isspace():
+        cut = text.rfind(' ', 0, cut)
+    return max(cut, 0)
+
 
 @dataclass
 class Chunk:
@@ -27,7 +83,8 @@ class TextChunker:
         self,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
-        encoding_name: str = "cl100k_base"
+        encoding_name: str = "cl100k_base",
+        backend: str = "auto"
     ):
         """
         Initialize chunker.
@@ -36,15 +93,31 @@ class TextChunker:
             chunk_size: Target chunk size in tokens
             chunk_overlap: Overlap between chunks in tokens
             encoding_name: Tiktoken encoding name
+            backend: Tokenizer library: 'tiktoken', 'riptoken', or 'auto'
+                (riptoken if installed, else tiktoken)
+                
+        Raises:
+            ValueError: If backend is not recognised
+            ImportError: If backend='riptoken' and it is not installed
         """
+        if backend not in TOKENIZER_BACKENDS:
+            raise ValueError(
+                f"Unknown tokenizer backend {backend!r}; expected one of {TOKENIZER_BACKENDS}"
+            )
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         
         try:
-            self.encoding = tiktoken.get_encoding(encoding_name)
+            self.encoding = _load_encoding(encoding_name, backend)
+        except ImportError:
+            raise
         except Exception as e:
             logger.warning(f"Error loading encoding {encoding_name}: {e}, using cl100k_base")
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+            self.encoding = _load_encoding("cl100k_base", backend)
+        
+        # Per-instance memo: the same section text is re-counted whenever a
+        # reused summarizer sees the paper again
+        self._count_tokens = functools.lru_cache(maxsize=1024)(self._encode_length)
     
     def chunk(self, text: str, section_name: Optional[str] = None) -> List[Chunk]:
         """
@@ -60,58 +133,61 @@ class TextChunker:
         if not text.strip():
             return []
         
-        # Split into sentences first
-        sentences = self._split_into_sentences(text)
+        # Split into sentences first (with their token counts)
+        sentences, sentence_lens = self._split_into_sentences(text)
         
         if not sentences:
             return []
         
-        # Create chunks
+        # Create chunks. Each sentence was encoded once while splitting; its
+        # token count is kept alongside it so nothing here re-encodes.
         chunks = []
-        current_tokens = []
         current_text = []
+        current_lens = []
+        current_token_count = 0
         current_start = 0
         chunk_index = 0
         
-        for sentence in sentences:
-            sentence_tokens = self.encoding.encode(sentence)
-            
+        for sentence, sentence_len in zip(sentences, sentence_lens):
             # Check if adding this sentence would exceed chunk size
-            if current_tokens and len(current_tokens) + len(sentence_tokens) > self.chunk_size:
+            if current_text and current_token_count + sentence_len > self.chunk_size:
                 # Create chunk from current content
                 chunk_text = ' '.join(current_text)
                 chunks.append(Chunk(
                     text=chunk_text,
                     start_char=current_start,
                     end_char=current_start + len(chunk_text),
-                    token_count=len(current_tokens),
+                    token_count=current_token_count,
                     chunk_index=chunk_index
                 ))
                 
                 chunk_index += 1
                 
-                # Calculate overlap
+                # Calculate overlap: take sentences from the end, tracking the
+                # length they occupy in chunk_text (sentences + separators)
                 overlap_tokens = self.chunk_overlap
-                overlap_sentences = []
+                overlap_count = 0
                 overlap_token_count = 0
-                
-                # Take sentences from end for overlap
-                for sent in reversed(current_text):
-                    sent_tokens = self.encoding.encode(sent)
-                    if overlap_token_count + len(sent_tokens) <= overlap_tokens:
-                        overlap_sentences.insert(0, sent)
-                        overlap_token_count += len(sent_tokens)
+                overlap_chars = -1  # n sentences are joined by n - 1 spaces
+                for sent, sent_len in zip(reversed(current_text), reversed(current_lens)):
+                    if overlap_token_count + sent_len <= overlap_tokens:
+                        overlap_count += 1
+                        overlap_token_count += sent_len
+                        overlap_chars += len(sent) + 1
                     else:
                         break
                 
                 # Start new chunk with overlap
-                current_text = overlap_sentences
-                current_tokens = self.encoding.encode(' '.join(current_text))
-                current_start = chunks[-1].end_char - len(' '.join(overlap_sentences))
+                keep = len(current_text) - overlap_count
+                current_text = current_text[keep:]
+                current_lens = current_lens[keep:]
+                current_token_count = overlap_token_count
+                current_start = chunks[-1].end_char - max(overlap_chars, 0)
             
             # Add sentence to current chunk
             current_text.append(sentence)
-            current_tokens.extend(sentence_tokens)
+            current_lens.append(sentence_len)
+            current_token_count += sentence_len
         
         # Add final chunk
         if current_text:
@@ -120,7 +196,7 @@ class TextChunker:
                 text=chunk_text,
                 start_char=current_start,
                 end_char=current_start + len(chunk_text),
-                token_count=len(current_tokens),
+                token_count=current_token_count,
                 chunk_index=chunk_index
             ))
         
@@ -129,39 +205,105 @@ class TextChunker:
         
         return chunks
     
-    def _split_into_sentences(self, text: str) -> List[str]:
+    def split_oversized(self, chunks: List[Chunk], max_tokens: float) -> List[Chunk]:
         """
-        Split text into sentences.
+        Bisect chunks longer than max_tokens until every piece fits.
         
-        Uses regex-based sentence boundary detection.
-        More sophisticated than simple split on periods.
+        Sentences are only split on punctuation, so a long run without any
+        (e.g. table data) can leave a chunk far over chunk_size. Such chunks
+        are halved at the space nearest their middle, recursively; chunks
+        are renumbered afterwards.
+        
+        Args:
+            chunks: Chunks from chunk()
+            max_tokens: Maximum tokens per chunk
+            
+        Returns:
+            Chunks with none over max_tokens (unless unsplittable)
         """
-        # Replace newlines with spaces (but preserve paragraph breaks)
-        text = re.sub(r'\n+', ' ', text)
+        if all(chunk.token_count <= max_tokens for chunk in chunks):
+            return chunks
         
-        # Sentence boundary pattern
-        # Matches: . ! ? followed by space and capital letter
-        # Avoids: abbreviations (Dr., Mr., etc.), decimals (1.5), etc.
-        pattern = r'(?<=[.!?])\s+(?=[A-Z])'
+        result = []
+        pending = list(reversed(chunks))
+        while pending:
+            chunk = pending.pop()
+            if chunk.token_count <= max_tokens or len(chunk.text) < 2:
+                result.append(chunk)
+                continue
+            
+            text = chunk.text
+            middle = len(text) // 2
+            left_end = text.rfind(' ', 0, middle + 1)
+            if left_end <= 0:
+                left_end = text.find(' ', middle)
+            if left_end <= 0:
+                left_end = right_start = middle  # No usable space: split mid-word
+            else:
+                right_start = left_end + 1
+            
+            # Pushed in reverse so the left half is processed first
+            for start, end in ((right_start, len(text)), (0, left_end)):
+                piece = text[start:end]
+                pending.append(Chunk(
+                    text=piece,
+                    start_char=chunk.start_char + start,
+                    end_char=chunk.start_char + end,
+                    token_count=self._encode_length(piece),
+                    chunk_index=0
+                ))
         
-        sentences = re.split(pattern, text)
+        for index, chunk in enumerate(result):
+            chunk.chunk_index = index
+        return result
+    
+    def _split_into_sentences(self, text: str) -> Tuple[List[str], List[int]]:
+        """
+        Split text into sentences.
         
-        # Clean sentences
-        sentences = [s.strip() for s in sentences if s.strip()]
+        Uses regex-based sentence boundary detection.
+        More sophisticated than simple split on periods.
         
-        # Handle sentences that are too long (split on other punctuation)
+        Returns:
+            Tuple of (sentences, token count of each sentence)
+        """
+        # Replace newlines with spaces (but preserve paragraph breaks); each
+        # run of newlines becomes one space. Cleaned text has runs of at most
+        # two, so this is normally one replace pass per step.
+        while '\n\n' in text:
+            text = text.replace('\n\n', '\n')
+        text = text.replace('\n', ' ')
+        
+        # Counting only needs ordinary text encoding, which skips the
+        # special-token scan that encode() runs on every call.
+        encode = getattr(self.encoding, 'encode_ordinary', self.encoding.encode)
         final_sentences = []
-        for sent in sentences:
-            sent_tokens = len(self.encoding.encode(sent))
+        final_lens = []
+        
+        # Split at sentence boundaries (_SENT_SPLIT_RE), cleaning and
+        # measuring each piece in the same loop.
+        # Avoids: abbreviations (Dr., Mr., etc.), decimals (1.5), etc.
+        for sent in _SENT_SPLIT_RE.split(text):
+            sent = sent.strip()
+            if not sent:
+                continue
+            
+            # Handle sentences that are too long (split on other punctuation)
+            sent_tokens = len(encode(sent))
             
             if sent_tokens > self.chunk_size * 1.5:
                 # Split on semicolons and commas for very long sentences
-                subsents = re.split(r'[;,]\s+', sent)
-                final_sentences.extend(s.strip() for s in subsents if s.strip())
+                subsents = _SUBSENT_RE.split(sent)
+                for sub in subsents:
+                    sub = sub.strip()
+                    if sub:
+                        final_sentences.append(sub)
+                        final_lens.append(len(encode(sub)))
             else:
                 final_sentences.append(sent)
+                final_lens.append(sent_tokens)
         
-        return final_sentences
+        return final_sentences, final_lens
     
     def count_tokens(self, text: str) -> int:
         """
@@ -173,8 +315,35 @@ class TextChunker:
         Returns:
             Token count
         """
+        return self._count_tokens(text)
+    
+    def _encode_length(self, text: str) -> int:
+        """Uncached token count."""
         return len(self.encoding.encode(text))
     
+    def fits_in_tokens(self, text: str, max_tokens: float) -> bool:
+        """
+        Check whether text is at most max_tokens tokens long.
+        
+        Cheaper than count_tokens() for long text: text that is clearly
+        over the limit is only encoded up to a prefix.
+        
+        Args:
+            text: Text to check
+            max_tokens: Token limit
+            
+        Returns:
+            True if the text fits
+        """
+        if _fits_unencoded(text, max_tokens):
+            return True
+        
+        cut = _prefix_cut(text, max_tokens)
+        if cut and len(self.encoding.encode(text[:cut])) > max_tokens:
+            return False
+        
+        return self.count_tokens(text) <= max_tokens
+    
     def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
         """
         Truncate text to maximum token count.
@@ -186,6 +355,17 @@ class TextChunker:
         Returns:
             Truncated text
         """
+        if _fits_unencoded(text, max_tokens):
+            return text
+        
+        # Callers pass whole papers to keep only the head, so encode just a
+        # prefix
+        cut = _prefix_cut(text, max_tokens)
+        if cut:
+            tokens = self.encoding.encode(text[:cut])
+            if len(tokens) > max_tokens:
+                return self.encoding.decode(tokens[:max_tokens])
+        
         tokens = self.encoding.encode(text)
         
         if len(tokens) <= max_tokens:
@@ -214,11 +394,12 @@ class TextChunker:
             }
         
         token_counts = [c.token_count for c in chunks]
+        total_tokens = sum(token_counts)
         
         return {
             'total_chunks': len(chunks),
-            'total_tokens': sum(token_counts),
-            'avg_tokens_per_chunk': sum(token_counts) / len(token_counts),
+            'total_tokens': total_tokens,
+            'avg_tokens_per_chunk': total_tokens / len(token_counts),
             'min_tokens': min(token_counts),
             'max_tokens': max(token_counts)
         }
@@ -1,13 +1,54 @@
 """
 Section detection and parsing for research papers.
 """
+import functools
+import os
 import re
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
 
+from ingestion.workers import discard_pool, shared_pool
+
 logger = logging.getLogger(__name__)
 
+_NUM_STRIP_RE = re.compile(r'^\d+\.\s*')
+_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+
+# Compiled on first use rather than at class definition, so patterns added
+# to HEADER_PATTERNS at runtime (see EXTENSIONS.md) are picked up too
+@functools.lru_cache(maxsize=8)
+def _boundary_re(
+    header_patterns: Tuple[Tuple[str, Tuple[str, ...]], ...],
+    num_prefix: str
+) -> Tuple["re.Pattern[str]", List[str]]:
+    """
+    Fuse every header pattern into one line-anchored alternation.
+    
+    Each alternative is wrapped in a group g<i>; the returned list maps i to
+    its section name. The trailing whitespace check is a lookahead so a
+    match never consumes the line breaks before the next header.
+    """
+    alternatives = []
+    names = []
+    for section_name, patterns in header_patterns:
+        for pattern in patterns:
+            alternatives.append(f'(?P<g{len(names)}>{pattern})')
+            names.append(section_name)
+    regex = re.compile(
+        r'^\s*' + num_prefix + '(?:' + '|'.join(alternatives) + r')(?=\s*$)',
+        re.MULTILINE | re.IGNORECASE
+    )
+    return regex, names
+
+
+@functools.lru_cache(maxsize=None)
+def _header_re(pattern: str) -> "re.Pattern[str]":
+    """Unanchored, case-insensitive header pattern."""
+    return re.compile(pattern, re.IGNORECASE)
+
 
 @dataclass
 class Section:
@@ -115,23 +156,25 @@ class SectionParser:
             and self._looks_like_abstract(text[:first_boundary_pos])
         )
         if implicit_abstract:
-            boundaries.insert(0, ('abstract', 0))
+            # No header was matched here, so there is no known header end
+            boundaries.insert(0, ('abstract', 0, None))
             # Re-sort since we inserted at 0 (first boundary pos is 0, others unchanged)
             boundaries.sort(key=lambda x: x[1])
         
         # Extract sections
         sections = {}
-        for i, (section_name, start_pos) in enumerate(boundaries):
+        for i, (section_name, start_pos, header_end) in enumerate(boundaries):
             # Determine end position
             if i + 1 < len(boundaries):
                 end_pos = boundaries[i + 1][1]
             else:
                 end_pos = len(text)
             
-            content = text[start_pos:end_pos].strip()
-            
-            # Remove section header from content
-            content = self._remove_header(content, section_name)
+            if header_end is not None:
+                # Content starts after the matched header line
+                content = text[header_end:end_pos].strip()
+            else:
+                content = self._remove_header(text[start_pos:end_pos].strip(), section_name)
             
             if content:
                 sections[section_name] = Section(
@@ -159,34 +202,33 @@ class SectionParser:
             return False
         return True
     
-    def _find_section_boundaries(self, text: str) -> List[Tuple[str, int]]:
+    def _find_section_boundaries(self, text: str) -> List[Tuple[str, int, int]]:
         """
         Find section boundaries in text.
         
         Returns:
-            List of (section_name, start_position) tuples
+            List of (section_name, start_position, header_end) tuples, where
+            header_end is the end of the matched header text (the rest of
+            that line is whitespace)
         """
-        boundaries = []
-        
-        for section_name, patterns in self.HEADER_PATTERNS.items():
-            for pattern in patterns:
-                # Look for pattern at start of line (with optional numbering: "1. ", "2. ")
-                full_pattern = r'^\s*' + self._NUM_PREFIX + pattern + r'\s*$'
-                regex = re.compile(full_pattern, re.MULTILINE | re.IGNORECASE)
-                
-                for match in regex.finditer(text):
-                    boundaries.append((section_name, match.start()))
-        
-        # Sort by position
-        boundaries.sort(key=lambda x: x[1])
+        # Look for any pattern as a whole line (with optional numbering:
+        # "1. ", "2. "); one scan finds every header in position order
+        regex, names = _boundary_re(
+            tuple((name, tuple(patterns)) for name, patterns in self.HEADER_PATTERNS.items()),
+            self._NUM_PREFIX
+        )
+        boundaries = [
+            (names[int(match.lastgroup[1:])], match.start(), match.end())
+            for match in regex.finditer(text)
+        ]
         
         # Remove duplicates (keep first occurrence of each section)
         seen_sections = set()
         unique_boundaries = []
-        for section_name, pos in boundaries:
-            if section_name not in seen_sections:
-                seen_sections.add(section_name)
-                unique_boundaries.append((section_name, pos))
+        for boundary in boundaries:
+            if boundary[0] not in seen_sections:
+                seen_sections.add(boundary[0])
+                unique_boundaries.append(boundary)
         
         return unique_boundaries
     
@@ -198,17 +240,53 @@ class SectionParser:
         if lines and lines[0].strip():
             first_line = lines[0].strip()
             # Strip optional leading numbering (e.g., "1. ", "2. ") for pattern matching
-            first_line_normalized = re.sub(r'^\d+\.\s*', '', first_line).upper()
+            first_line_normalized = _NUM_STRIP_RE.sub('', first_line).upper()
             
             # Check against patterns
             patterns = self.HEADER_PATTERNS.get(section_name, [])
             for pattern in patterns:
-                if re.search(pattern, first_line_normalized, re.IGNORECASE):
+                if _header_re(pattern).search(first_line_normalized):
                     # Remove first line
                     return '\n'.join(lines[1:]).strip()
         
         return content
     
+    def parse_batch(
+        self,
+        texts: List[str],
+        n_workers: Optional[int] = None
+    ) -> List[Dict[str, Section]]:
+        """
+        Parse several papers, spreading them across worker processes.
+        
+        Parsing one paper takes a few milliseconds and shipping its text to a
+        worker costs ~10% of that, so this only pays off for batches on
+        multi-core machines. The parser is pickled to the workers, so
+        subclasses must be importable (not defined inside a function).
+        
+        Args:
+            texts: Full paper texts
+            n_workers: Worker processes (default: CPU count, capped at 8);
+                1 parses in the calling process
+                
+        Returns:
+            One section dictionary per text, in input order
+        """
+        texts = list(texts)
+        n_workers = max(1, n_workers) if n_workers else _MAX_WORKERS
+        
+        if n_workers <= 1 or len(texts) <= 1:
+            return [self.parse(text) for text in texts]
+        
+        # Reuse the process-wide pool so repeated batches skip worker start-up
+        chunksize = max(1, len(texts) // (4 * min(n_workers, len(texts))))
+        pool = shared_pool(n_workers)
+        try:
+            return list(pool.map(self.parse, texts, chunksize=chunksize))
+        except BrokenProcessPool:
+            discard_pool(n_workers, pool)
+            raise
+    
     def get_section_order(self, sections: Dict[str, Section]) -> List[str]:
         """
         Get sections in logical order.
@@ -0,0 +1,153 @@
+"""
+Disk-backed cache for LLM responses.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "~/.cache/medsum"
+DEFAULT_MAX_ENTRIES = 10_000  # responses are a few KB: tens of MB on disk
+
+# Writes between prunes; the table may exceed its cap by this many rows
+_PRUNE_EVERY = 100
+# A hit only refreshes its "used" time once it is this stale (seconds), so
+# repeated runs read without writing; recency is tracked to about a day
+_TOUCH_INTERVAL = 24 * 60 * 60
+
+
+class LLMResponseCache:
+    """
+    Persist LLM responses across runs, keyed on everything that shapes them.
+    
+    Backed by a single SQLite file so it needs no extra dependency and is
+    safe to share between processes. One connection is shared across threads
+    (LLM calls run on the client's event loop thread as well as the caller's)
+    behind a lock. The store is capped at ``max_entries`` responses; the
+    least recently used are pruned beyond that.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Initialize cache.
+        
+        Args:
+            cache_dir: Directory for the cache file (default: $MEDSUM_CACHE_DIR
+                or ~/.cache/medsum)
+            max_entries: Responses kept (default: $MEDSUM_CACHE_MAX_ENTRIES
+                or 10000)
+                
+        Raises:
+            OSError: If the cache directory cannot be created
+            sqlite3.Error: If the cache file cannot be opened
+        """
+        directory = Path(
+            cache_dir or os.getenv("MEDSUM_CACHE_DIR", DEFAULT_CACHE_DIR)
+        ).expanduser()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / "llm.sqlite3"
+        self.max_entries = max(1, max_entries or int(
+            os.getenv("MEDSUM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        ))
+        
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "used REAL NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_used ON responses (used)"
+        )
+        self._prune()
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Build a cache key from the request parameters.
+        
+        Args:
+            parts: Model, sampling settings, prompts, etc.
+            
+        Returns:
+            Hex digest (blake2b is the fastest strong hash in hashlib)
+        """
+        digest = hashlib.blake2b(digest_size=32)
+        for part in parts:
+            data = str(part).encode("utf-8")
+            # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Key from make_key()
+            
+        Returns:
+            Cached response text or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, used FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > _TOUCH_INTERVAL:
+                # Mark as recently used so pruning keeps it
+                self._conn.execute(
+                    "UPDATE responses SET used = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+        return row[0]
+    
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response.
+        
+        Args:
+            key: Key from make_key()
+            response: Response text
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, used) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune()
+            self._conn.commit()
+    
+    def _prune(self) -> None:
+        """Delete the least recently used responses beyond max_entries (lock held)."""
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+    
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
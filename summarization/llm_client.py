@@ -1,18 +1,44 @@
 """
 LLM client with retry logic and model fallback.
 """
-import anthropic
-from openai import OpenAI
+import asyncio
+import random
+import threading
 import time
 import json
-from typing import Optional, List, Dict, Any
+from functools import cached_property
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, List, Dict, Any, TypeVar
 from enum import Enum
 import logging
 
+if TYPE_CHECKING:
+    import anthropic
+    import openai
+
 from config import settings
+from summarization.llm_cache import LLMResponseCache
+
+try:
+    from orjson import loads as _json_loads  # faster drop-in parser (optional)
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _load_json(response: str) -> Any:
+    """Parse a JSON response, removing markdown code blocks if present."""
+    cleaned = response.strip()
+    if cleaned.startswith("```"):
+        # Drop the opening ```json / ``` line (or bare ```) and the
+        # closing ``` with a single slice
+        start = cleaned.find("\n") + 1 or 3
+        cleaned = cleaned[start:-3] if cleaned.endswith("```") else cleaned[start:]
+    # orjson takes str directly; its JSONDecodeError subclasses json's
+    return _json_loads(cleaned.strip())
+
 
 class ModelProvider(Enum):
     """Supported LLM providers."""
@@ -20,6 +46,27 @@ class ModelProvider(Enum):
     OPENAI = "openai"
 
 
+# Model name prefix -> provider, checked in order
+_PROVIDER_BY_PREFIX = (
+    ("claude", ModelProvider.ANTHROPIC),
+    ("gpt", ModelProvider.OPENAI),
+    ("o1", ModelProvider.OPENAI),
+    ("o3", ModelProvider.OPENAI),
+)
+
+# OpenAI reasoning models take max_completion_tokens and only the default
+# temperature
+_OPENAI_REASONING_PREFIXES = ("o1", "o3")
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Event loop running in the current thread, if any."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
 class LLMClient:
     """Unified LLM client with retry and fallback."""
     
@@ -28,7 +75,8 @@ class LLMClient:
         primary_model: Optional[str] = None,
         fallback_model: Optional[str] = None,
         temperature: float = 0.2,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        cache: Optional[LLMResponseCache] = None
     ):
         """
         Initialize LLM client.
@@ -38,25 +86,52 @@ class LLMClient:
             fallback_model: Fallback model if primary fails
             temperature: Sampling temperature
             max_tokens: Maximum response tokens
+            cache: Optional response cache consulted before each API call
         """
         self.primary_model = primary_model or settings.primary_model
         self.fallback_model = fallback_model or settings.fallback_model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.cache = cache
         
-        # Initialize clients
-        self.anthropic_client = None
-        self.openai_client = None
-        
-        if settings.anthropic_api_key:
-            self.anthropic_client = anthropic.Anthropic(
-                api_key=settings.anthropic_api_key
-            )
-        
-        if settings.openai_api_key:
-            self.openai_client = OpenAI(
-                api_key=settings.openai_api_key
-            )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+    
+    # Provider clients are created on first use (None without an API key).
+    # The SDKs are imported there too: together they take seconds to import,
+    # and most runs only ever talk to one provider.
+    
+    @cached_property
+    def anthropic_client(self) -> Optional["anthropic.Anthropic"]:
+        """Anthropic client."""
+        if not settings.anthropic_api_key:
+            return None
+        import anthropic
+        return anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    
+    @cached_property
+    def async_anthropic_client(self) -> Optional["anthropic.AsyncAnthropic"]:
+        """Async Anthropic client (backs complete_async/complete_many)."""
+        if not settings.anthropic_api_key:
+            return None
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+    
+    @cached_property
+    def openai_client(self) -> Optional["openai.OpenAI"]:
+        """OpenAI client."""
+        if not settings.openai_api_key:
+            return None
+        import openai
+        return openai.OpenAI(api_key=settings.openai_api_key)
+    
+    @cached_property
+    def async_openai_client(self) -> Optional["openai.AsyncOpenAI"]:
+        """Async OpenAI client (backs complete_async/complete_many)."""
+        if not settings.openai_api_key:
+            return None
+        import openai
+        return openai.AsyncOpenAI(api_key=settings.openai_api_key)
     
     def complete(
         self,
@@ -64,7 +139,9 @@ class LLMClient:
         system_prompt: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        json_mode: bool = False
+        json_mode: bool = False,
+        no_cache: bool = False,
+        validate: Optional[Callable[[str], Any]] = None
     ) -> str:
         """
         Get completion from LLM.
@@ -75,7 +152,73 @@ class LLMClient:
             temperature: Override default temperature
             max_tokens: Override default max tokens
             json_mode: Request JSON response
+            no_cache: Bypass the response cache (neither read nor store), for
+                prompts whose answer should not be reused
+            validate: Check run on the response before it is cached (e.g. the
+                caller's parser); whatever it raises propagates and the
+                response is not stored. Without one, JSON-mode responses are
+                only cached if they parse.
+                
+        Returns:
+            Model response text
             
+        Raises:
+            RuntimeError: If all attempts fail
+        """
+        temp = temperature if temperature is not None else self.temperature
+        max_tok = max_tokens if max_tokens is not None else self.max_tokens
+        
+        if self.cache is None or no_cache:
+            response = self._complete(prompt, system_prompt, temp, max_tok, json_mode)
+            if validate is not None and response is not None:
+                validate(response)
+            return response
+        
+        key = self._cache_key(prompt, system_prompt, temp, max_tok, json_mode)
+        cached = self.cache.get(key)
+        if cached is not None and self._cacheable(cached, json_mode, validate):
+            logger.debug("LLM cache hit")
+            return cached
+        
+        response = self._complete(prompt, system_prompt, temp, max_tok, json_mode)
+        if response is None:
+            return response
+        if validate is not None:
+            validate(response)  # A rejected response raises here, before it is stored
+        elif not self._cacheable(response, json_mode):
+            return response
+        self.cache.set(key, response)
+        return response
+    
+    async def complete_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        no_cache: bool = False,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        """
+        Get completion from LLM without blocking the event loop.
+        
+        Same behaviour as complete() (cache, retries, fallback), but the API
+        call is awaited on the async SDK clients.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt
+            temperature: Override default temperature
+            max_tokens: Override default max tokens
+            json_mode: Request JSON response
+            no_cache: Bypass the response cache (neither read nor store), for
+                prompts whose answer should not be reused
+            validate: Check run on the response before it is cached (e.g. the
+                caller's parser); whatever it raises propagates and the
+                response is not stored. Without one, JSON-mode responses are
+                only cached if they parse.
+                
         Returns:
             Model response text
             
@@ -85,6 +228,151 @@ class LLMClient:
         temp = temperature if temperature is not None else self.temperature
         max_tok = max_tokens if max_tokens is not None else self.max_tokens
         
+        if self.cache is None or no_cache:
+            response = await self._complete_async(prompt, system_prompt, temp, max_tok, json_mode)
+            if validate is not None and response is not None:
+                validate(response)
+            return response
+        
+        # SQLite calls block (and writes fsync): keep them off the event loop
+        key = self._cache_key(prompt, system_prompt, temp, max_tok, json_mode)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None and self._cacheable(cached, json_mode, validate):
+            logger.debug("LLM cache hit")
+            return cached
+        
+        response = await self._complete_async(prompt, system_prompt, temp, max_tok, json_mode)
+        if response is None:
+            return response
+        if validate is not None:
+            validate(response)  # A rejected response raises here, before it is stored
+        elif not self._cacheable(response, json_mode):
+            return response
+        await asyncio.to_thread(self.cache.set, key, response)
+        return response
+    
+    async def complete_many(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        concurrency: int = 8,
+        no_cache: bool = False
+    ) -> List[str]:
+        """
+        Complete independent prompts concurrently.
+        
+        Args:
+            prompts: User prompts (e.g. one per chunk)
+            system_prompt: System prompt shared by all calls
+            temperature: Override default temperature
+            max_tokens: Override default max tokens
+            json_mode: Request JSON responses
+            concurrency: Maximum requests in flight at once
+            no_cache: Bypass the response cache
+            
+        Returns:
+            Model responses, in the same order as prompts
+            
+        Raises:
+            RuntimeError: If all attempts fail for any prompt
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run(prompt: str) -> str:
+            async with semaphore:
+                return await self.complete_async(
+                    prompt, system_prompt, temperature, max_tokens, json_mode, no_cache
+                )
+        
+        return await asyncio.gather(*(run(prompt) for prompt in prompts))
+    
+    def run_sync(self, coro: Awaitable[T]) -> T:
+        """
+        Run a coroutine on the client's event loop and wait for the result.
+        
+        Lets synchronous code drive the async API, including code that is
+        itself called from inside another event loop (e.g. a web handler).
+        
+        Args:
+            coro: Coroutine to run (typically built on complete_async)
+            
+        Returns:
+            The coroutine's result
+            
+        Raises:
+            RuntimeError: If called from a coroutine already running on the
+                client's loop (it would deadlock; await it instead)
+        """
+        loop = self._get_loop()
+        if _running_loop() is loop:
+            raise RuntimeError("run_sync() called from the client's own event loop")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Event loop that performs this client's async API calls.
+        
+        The async SDK clients keep connection pools bound to the loop they
+        were first used on, so all their calls run on one long-lived loop in
+        a daemon thread, whichever loop or thread they are awaited from.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="llm-client", daemon=True
+                ).start()
+            return self._loop
+    
+    async def _on_client_loop(self, coro: Awaitable[T]) -> T:
+        """Await an SDK call on the client's loop (see _get_loop)."""
+        loop = self._get_loop()
+        if _running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+    
+    def _cache_key(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temp: float,
+        max_tok: int,
+        json_mode: bool
+    ) -> str:
+        """Cache key covering everything that shapes the response."""
+        return self.cache.make_key(
+            self.primary_model, self.fallback_model, temp, max_tok,
+            json_mode, system_prompt, prompt
+        )
+    
+    @staticmethod
+    def _cacheable(
+        response: str,
+        json_mode: bool,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> bool:
+        """Whether a response passes the caller's check (JSON parse by default)."""
+        check = validate if validate is not None else _load_json if json_mode else None
+        if check is None:
+            return True
+        try:
+            check(response)
+        except Exception:
+            return False
+        return True
+    
+    def _complete(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temp: float,
+        max_tok: int,
+        json_mode: bool
+    ) -> str:
+        """Call the primary model, falling back to the secondary on failure."""
         # Try primary model
         try:
             return self._call_model(
@@ -116,6 +404,44 @@ class LLMClient:
             else:
                 raise RuntimeError(f"Model failed and no fallback configured: {e}")
     
+    async def _complete_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temp: float,
+        max_tok: int,
+        json_mode: bool
+    ) -> str:
+        """Async counterpart of _complete()."""
+        try:
+            return await self._call_model_async(
+                self.primary_model,
+                prompt,
+                system_prompt,
+                temp,
+                max_tok,
+                json_mode
+            )
+        except Exception as e:
+            logger.warning(f"Primary model {self.primary_model} failed: {e}")
+            
+            if self.fallback_model:
+                try:
+                    logger.info(f"Attempting fallback to {self.fallback_model}")
+                    return await self._call_model_async(
+                        self.fallback_model,
+                        prompt,
+                        system_prompt,
+                        temp,
+                        max_tok,
+                        json_mode
+                    )
+                except Exception as fallback_error:
+                    logger.error(f"Fallback model {self.fallback_model} failed: {fallback_error}")
+                    raise RuntimeError(f"All models failed. Last error: {fallback_error}")
+            else:
+                raise RuntimeError(f"Model failed and no fallback configured: {e}")
+    
     def _call_model(
         self,
         model: str,
@@ -127,11 +453,12 @@ class LLMClient:
     ) -> str:
         """Call specific model with retry logic."""
         provider = self._get_provider(model)
+        last_error = None
         
         for attempt in range(settings.max_retries):
             try:
                 if attempt > 0:
-                    delay = settings.rate_limit_delay * (2 ** attempt)  # Exponential backoff
+                    delay = self._retry_delay(attempt, last_error)
                     logger.info(f"Retry attempt {attempt + 1}, waiting {delay}s")
                     time.sleep(delay)
                 
@@ -145,14 +472,83 @@ class LLMClient:
                     )
                 else:
                     raise ValueError(f"Unknown provider for model: {model}")
-                    
+            
             except Exception as e:
                 if attempt == settings.max_retries - 1:
                     raise
                 logger.warning(f"Attempt {attempt + 1} failed: {e}")
+                last_error = e
         
         raise RuntimeError("Max retries exceeded")
     
+    async def _call_model_async(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> str:
+        """Async counterpart of _call_model(); backs off without blocking."""
+        provider = self._get_provider(model)
+        last_error = None
+        
+        for attempt in range(settings.max_retries):
+            try:
+                if attempt > 0:
+                    delay = self._retry_delay(attempt, last_error)
+                    logger.info(f"Retry attempt {attempt + 1}, waiting {delay}s")
+                    await asyncio.sleep(delay)
+                
+                if provider == ModelProvider.ANTHROPIC:
+                    return await self._call_anthropic_async(
+                        model, prompt, system_prompt, temperature, max_tokens
+                    )
+                elif provider == ModelProvider.OPENAI:
+                    return await self._call_openai_async(
+                        model, prompt, system_prompt, temperature, max_tokens, json_mode
+                    )
+                else:
+                    raise ValueError(f"Unknown provider for model: {model}")
+            
+            except Exception as e:
+                if attempt == settings.max_retries - 1:
+                    raise
+                logger.warning(f"Attempt {attempt + 1} failed: {e}")
+                last_error = e
+        
+        raise RuntimeError("Max retries exceeded")
+    
+    def _retry_delay(self, attempt: int, error: Optional[Exception]) -> float:
+        """
+        Seconds to wait before the given retry attempt.
+        
+        Honours a Retry-After header on rate-limit responses; otherwise uses
+        exponential backoff with full jitter, so concurrent callers that were
+        throttled together don't all retry at the same moment. Either way
+        the wait is capped at settings.max_retry_delay, so a huge or bogus
+        header cannot stall the call (and the caller's slot) for an hour.
+        
+        Args:
+            attempt: Retry attempt number (1 for the first retry)
+            error: Exception raised by the previous attempt
+            
+        Returns:
+            Delay in seconds
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            try:
+                delay = max(0.0, float(headers.get("retry-after")))
+                return min(delay, settings.max_retry_delay)
+            except (TypeError, ValueError):
+                pass  # Absent, or an HTTP date rather than seconds
+        
+        backoff = settings.rate_limit_delay * (2 ** attempt)
+        return random.uniform(0, min(backoff, settings.max_retry_delay))
+    
     def _call_anthropic(
         self,
         model: str,
@@ -165,6 +561,41 @@ class LLMClient:
         if not self.anthropic_client:
             raise RuntimeError("Anthropic client not initialized")
         
+        response = self.anthropic_client.messages.create(
+            **self._anthropic_request(model, prompt, system_prompt, temperature, max_tokens)
+        )
+        
+        return response.content[0].text
+    
+    async def _call_anthropic_async(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Call Anthropic API asynchronously."""
+        if not self.async_anthropic_client:
+            raise RuntimeError("Anthropic client not initialized")
+        
+        response = await self._on_client_loop(
+            self.async_anthropic_client.messages.create(
+                **self._anthropic_request(model, prompt, system_prompt, temperature, max_tokens)
+            )
+        )
+        
+        return response.content[0].text
+    
+    def _anthropic_request(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Build Anthropic messages.create() arguments."""
         messages = [{"role": "user", "content": prompt}]
         
         kwargs = {
@@ -175,11 +606,15 @@ class LLMClient:
         }
         
         if system_prompt:
-            kwargs["system"] = system_prompt
-        
-        response = self.anthropic_client.messages.create(**kwargs)
+            # Mark the (static) system prompt for prompt caching; Anthropic
+            # ignores the marker while the prefix is below its minimum size
+            kwargs["system"] = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
         
-        return response.content[0].text
+        return kwargs
     
     def _call_openai(
         self,
@@ -194,33 +629,77 @@ class LLMClient:
         if not self.openai_client:
             raise RuntimeError("OpenAI client not initialized")
         
+        response = self.openai_client.chat.completions.create(
+            **self._openai_request(
+                model, prompt, system_prompt, temperature, max_tokens, json_mode
+            )
+        )
+        
+        return response.choices[0].message.content
+    
+    async def _call_openai_async(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> str:
+        """Call OpenAI API asynchronously."""
+        if not self.async_openai_client:
+            raise RuntimeError("OpenAI client not initialized")
+        
+        response = await self._on_client_loop(
+            self.async_openai_client.chat.completions.create(
+                **self._openai_request(
+                    model, prompt, system_prompt, temperature, max_tokens, json_mode
+                )
+            )
+        )
+        
+        return response.choices[0].message.content
+    
+    def _openai_request(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> Dict[str, Any]:
+        """Build OpenAI chat.completions.create() arguments."""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        kwargs = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+        if model.startswith(_OPENAI_REASONING_PREFIXES):
+            kwargs = {
+                "model": model,
+                "messages": messages,
+                "max_completion_tokens": max_tokens
+            }
+        else:
+            kwargs = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }
         
         if json_mode:
             kwargs["response_format"] = {"type": "json_object"}
         
-        response = self.openai_client.chat.completions.create(**kwargs)
-        
-        return response.choices[0].message.content
+        return kwargs
     
     def _get_provider(self, model: str) -> ModelProvider:
         """Determine provider from model name."""
-        if model.startswith("claude"):
-            return ModelProvider.ANTHROPIC
-        elif model.startswith("gpt"):
-            return ModelProvider.OPENAI
-        else:
-            raise ValueError(f"Cannot determine provider for model: {model}")
+        for prefix, provider in _PROVIDER_BY_PREFIX:
+            if model.startswith(prefix):
+                return provider
+        raise ValueError(f"Cannot determine provider for model: {model}")
     
     def parse_json_response(self, response: str) -> dict:
         """
@@ -235,17 +714,8 @@ class LLMClient:
         Raises:
             ValueError: If response is not valid JSON
         """
-        # Remove markdown code blocks if present
-        cleaned = response.strip()
-        if cleaned.startswith("```"):
-            # Remove opening ```json or ```
-            cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else cleaned[3:]
-            # Remove closing ```
-            if cleaned.endswith("```"):
-                cleaned = cleaned[:-3]
-        
         try:
-            return json.loads(cleaned.strip())
+            return _load_json(response)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response: {response[:200]}")
             raise ValueError(f"Invalid JSON response: {e}")
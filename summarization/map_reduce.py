@@ -1,10 +1,12 @@
 """
 Map-reduce summarization orchestrator.
 """
-import re
-from typing import Dict, List, Optional
+import asyncio
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
 from processing.section_parser import Section
 from processing.chunker import TextChunker, Chunk
 from summarization.llm_client import LLMClient
@@ -12,6 +14,47 @@ from summarization import prompts
 
 logger = logging.getLogger(__name__)
 
+_SUMMARY_LIST = TypeAdapter(List[str])
+
+# Share of max_tokens one call's source text may use (the rest is left for
+# the prompt around it)
+_INPUT_SHARE = 0.7
+
+# Sections whose summaries extract_structured_info() reads (see
+# _get_limitations_text and _get_conclusion_text)
+_EXTRACTION_SOURCES = frozenset(('results', 'discussion', 'conclusion'))
+
+# Word-set Jaccard similarity above which chunk summaries count as repeats
+# of each other and the reduce call is skipped
+_DUPLICATE_JACCARD = 0.85
+
+
+def _near_duplicate(summaries: List[str]) -> Optional[str]:
+    """
+    Return the longest summary if every other one repeats it, else None.
+    
+    A summary repeats the longest one when their word sets have Jaccard
+    similarity of at least _DUPLICATE_JACCARD and it has no number the
+    longest lacks, so no statistic is lost by dropping it.
+    """
+    word_sets = [set(summary.lower().split()) for summary in summaries]
+    longest = max(range(len(summaries)), key=lambda i: len(summaries[i]))
+    kept = word_sets[longest]
+    
+    for words in word_sets:
+        if len(words & kept) < _DUPLICATE_JACCARD * len(words | kept):
+            return None
+        if any(word not in kept and any(c.isdigit() for c in word) for word in words):
+            return None
+    return summaries[longest]
+
+
+class _CombinedExtraction(BaseModel):
+    """Response shape of the combined extraction prompt."""
+    key_findings: Optional[List[str]] = None
+    limitations: Optional[List[str]] = None
+    author_conclusions: Optional[str] = None
+
 
 class MapReduceSummarizer:
     """Orchestrate map-reduce summarization of document sections."""
@@ -19,7 +62,8 @@ class MapReduceSummarizer:
     def __init__(
         self,
         llm_client: LLMClient,
-        chunker: TextChunker
+        chunker: TextChunker,
+        marshal_k: int = 1
     ):
         """
         Initialize summarizer.
@@ -27,36 +71,98 @@ class MapReduceSummarizer:
         Args:
             llm_client: LLM client for API calls
             chunker: Text chunker
+            marshal_k: Chunks packed into each map-phase LLM call (1 = one
+                call per chunk)
         """
         self.llm = llm_client
         self.chunker = chunker
+        self.marshal_k = max(1, marshal_k)
     
     def summarize_section(
         self,
         section: Section,
-        max_chunks: int = 20
+        max_chunks: int = 20,
+        concurrency: int = 4
     ) -> str:
         """
         Summarize a section using map-reduce.
         
+        Blocking wrapper around summarize_section_async(): the chunks are
+        still summarized concurrently.
+        
         Args:
             section: Section to summarize
             max_chunks: Maximum chunks to process
+            concurrency: Maximum simultaneous LLM requests
             
         Returns:
             Section summary
         """
-        logger.info(f"Summarizing section: {section.name}")
+        return self.llm.run_sync(self.summarize_section_async(
+            section, asyncio.Semaphore(max(1, concurrency)), max_chunks
+        ))
+    
+    async def summarize_section_async(
+        self,
+        section: Section,
+        semaphore: asyncio.Semaphore,
+        max_chunks: int = 20
+    ) -> str:
+        """
+        Summarize a section, running the map phase concurrently.
         
-        # Check if section is short enough to summarize directly
-        token_count = self.chunker.count_tokens(section.content)
+        Args:
+            section: Section to summarize
+            semaphore: Bounds the number of in-flight LLM calls
+            max_chunks: Maximum chunks to process
+            
+        Returns:
+            Section summary
+        """
+        logger.info(f"Summarizing section: {section.name}")
         
-        if token_count <= self.llm.max_tokens * 0.7:  # Leave room for prompt
+        chunks = self._plan_section(section, max_chunks)
+        if chunks is None:
+            async with semaphore:
+                return await self._summarize_directly(section)
+        
+        async def summarize_chunk(chunk: Chunk) -> str:
+            async with semaphore:
+                return await self._summarize_chunk(section.name, chunk)
+        
+        async def summarize_batch(batch: List[Chunk]) -> List[str]:
+            if len(batch) == 1:
+                return [await summarize_chunk(batch[0])]
+            async with semaphore:
+                logger.debug(f"Summarizing {len(batch)} chunks of {section.name}")
+                summaries = await self._summarize_batch(section.name, batch)
+            if summaries is not None:
+                return summaries
+            # Retry each chunk on its own, concurrently (one slot per call)
+            return list(await asyncio.gather(*(summarize_chunk(c) for c in batch)))
+        
+        # Map phase: gather preserves chunk order
+        results = await asyncio.gather(*(summarize_batch(b) for b in self._batches(chunks)))
+        chunk_summaries = [summary for batch in results for summary in batch]
+        
+        async with semaphore:
+            return await self._reduce(section.name, chunk_summaries)
+    
+    def _plan_section(self, section: Section, max_chunks: int) -> Optional[List[Chunk]]:
+        """Return the chunks to map over, or None if the section fits in one call."""
+        budget = self.llm.max_tokens * _INPUT_SHARE
+        
+        # Check if section is short enough to summarize directly (sections
+        # that are not get encoded again sentence by sentence when chunked,
+        # so only a prefix of those is encoded here)
+        if self.chunker.fits_in_tokens(section.content, budget):
             logger.info(f"Section {section.name} is short, summarizing directly")
-            return self._summarize_directly(section)
+            return None
         
-        # Chunk section
-        chunks = self.chunker.chunk(section.content, section.name)
+        # Chunk section, splitting any chunk too long for one call
+        chunks = self.chunker.split_oversized(
+            self.chunker.chunk(section.content, section.name), budget
+        )
         
         if len(chunks) > max_chunks:
             logger.warning(
@@ -65,25 +171,33 @@ class MapReduceSummarizer:
             )
             chunks = chunks[:max_chunks]
         
-        # Map phase: Summarize each chunk
-        chunk_summaries = []
-        for i, chunk in enumerate(chunks):
-            logger.debug(f"Summarizing chunk {i+1}/{len(chunks)} of {section.name}")
-            summary = self._summarize_chunk(section.name, chunk)
-            chunk_summaries.append(summary)
+        return chunks
+    
+    async def _reduce(self, section_name: str, chunk_summaries: List[str]) -> str:
+        """
+        Combine chunk summaries (reduce phase).
         
-        # Reduce phase: Combine chunk summaries
+        The call is skipped for a single chunk, and when all the summaries
+        say the same thing (see _near_duplicate).
+        """
         if len(chunk_summaries) == 1:
             return chunk_summaries[0]
         
-        logger.info(f"Combining {len(chunk_summaries)} chunk summaries for {section.name}")
-        return self._combine_summaries(section.name, chunk_summaries)
+        duplicate = _near_duplicate(chunk_summaries)
+        if duplicate is not None:
+            logger.info(
+                f"Chunk summaries for {section_name} are near-identical, skipping reduce"
+            )
+            return duplicate
+        
+        logger.info(f"Combining {len(chunk_summaries)} chunk summaries for {section_name}")
+        return await self._combine_summaries(section_name, chunk_summaries)
     
-    def _summarize_directly(self, section: Section) -> str:
+    async def _summarize_directly(self, section: Section) -> str:
         """Summarize short section directly without chunking."""
         prompt = prompts.get_chunk_summary_prompt(section.name, section.content)
         
-        response = self.llm.complete(
+        response = await self.llm.complete_async(
             prompt=prompt,
             system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
             temperature=0.2
@@ -91,11 +205,11 @@ class MapReduceSummarizer:
         
         return response.strip()
     
-    def _summarize_chunk(self, section_name: str, chunk: Chunk) -> str:
+    async def _summarize_chunk(self, section_name: str, chunk: Chunk) -> str:
         """Summarize a single chunk (map phase)."""
         prompt = prompts.get_chunk_summary_prompt(section_name, chunk.text)
         
-        response = self.llm.complete(
+        response = await self.llm.complete_async(
             prompt=prompt,
             system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
             temperature=0.2
@@ -103,7 +217,83 @@ class MapReduceSummarizer:
         
         return response.strip()
     
-    def _combine_summaries(
+    def _batches(self, chunks: List[Chunk]) -> List[List[Chunk]]:
+        """
+        Split chunks into consecutive groups of up to ``marshal_k``.
+        
+        A group is also closed before its text would exceed the token budget
+        of a single call, so large chunks are packed fewer to a request.
+        """
+        budget = self.llm.max_tokens * _INPUT_SHARE
+        batches = []
+        current = []
+        current_tokens = 0
+        for chunk in chunks:
+            if current and (
+                len(current) == self.marshal_k
+                or current_tokens + chunk.token_count > budget
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(chunk)
+            current_tokens += chunk.token_count
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _summarize_batch(
+        self,
+        section_name: str,
+        batch: List[Chunk]
+    ) -> Optional[List[str]]:
+        """
+        Summarize several chunks with one LLM call (row-marshaling).
+        
+        Returns None if the response cannot be parsed into exactly one
+        summary per chunk, so the caller can summarize them individually.
+        """
+        prompt = prompts.get_batch_chunk_summary_prompt(
+            section_name, [chunk.text for chunk in batch]
+        )
+        
+        # Validated before caching, so an unusable reply is not replayed
+        def parse(response: str) -> List[str]:
+            return self._parse_batch(response, len(batch))
+        
+        try:
+            return parse(await self.llm.complete_async(
+                prompt=prompt,
+                system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
+                temperature=0.2,
+                json_mode=True,
+                validate=parse
+            ))
+        except (ValueError, ValidationError) as e:
+            logger.warning(
+                f"Batched summary of {len(batch)} chunks from {section_name} "
+                f"unusable ({e}); summarizing individually"
+            )
+            return None
+    
+    def _parse_batch(self, response: str, size: int) -> List[str]:
+        """
+        Parse a batched summary response into one summary per chunk.
+        
+        Raises:
+            ValueError: If the response is not valid JSON or has the wrong count
+            ValidationError: If the summaries are not a list of strings
+        """
+        parsed = self.llm.parse_json_response(response)
+        if isinstance(parsed, dict):
+            parsed = parsed.get('summaries')
+        summaries = _SUMMARY_LIST.validate_python(parsed)
+        if len(summaries) != size:
+            raise ValueError(f"expected {size} summaries, got {len(summaries)}")
+        return [summary.strip() for summary in summaries]
+    
+    async def _combine_summaries(
         self,
         section_name: str,
         summaries: List[str]
@@ -121,7 +311,7 @@ class MapReduceSummarizer:
             num_chunks=len(summaries)
         )
         
-        response = self.llm.complete(
+        response = await self.llm.complete_async(
             prompt=prompt,
             system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
             temperature=0.2
@@ -131,27 +321,132 @@ class MapReduceSummarizer:
     
     def summarize_all_sections(
         self,
-        sections: Dict[str, Section]
+        sections: Dict[str, Section],
+        concurrency: int = 4
     ) -> Dict[str, str]:
         """
         Summarize all sections.
         
+        Blocking wrapper around summarize_all_sections_async().
+        
         Args:
             sections: Dictionary of sections
+            concurrency: Maximum simultaneous LLM requests
             
         Returns:
             Dictionary mapping section names to summaries
         """
-        summaries = {}
+        return self.llm.run_sync(
+            self.summarize_all_sections_async(sections, concurrency=concurrency)
+        )
+    
+    async def summarize_all_sections_async(
+        self,
+        sections: Dict[str, Section],
+        concurrency: int = 4
+    ) -> Dict[str, str]:
+        """
+        Summarize all sections with up to ``concurrency`` LLM calls in flight.
         
-        for name, section in sections.items():
-            try:
-                summary = self.summarize_section(section)
-                summaries[name] = summary
-            except Exception as e:
-                logger.error(f"Error summarizing section {name}: {e}")
+        Sections, and the chunks within each section, are summarized
+        concurrently; one semaphore bounds the requests across both levels.
+        Keep ``concurrency`` modest: throughput is bounded by provider rate
+        limits, not by local resources.
+        
+        Args:
+            sections: Dictionary of sections
+            concurrency: Maximum simultaneous LLM requests
+            
+        Returns:
+            Dictionary mapping section names to summaries
+        """
+        # Created per run: a semaphore is bound to the running event loop.
+        # A zero limit would never admit a call, so clamp to sequential.
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        return await self._collect_summaries(self._start_sections(sections, semaphore))
+    
+    async def summarize_and_extract_async(
+        self,
+        sections: Dict[str, Section],
+        preamble: str = "",
+        concurrency: int = 4,
+        failures: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, str], dict]:
+        """
+        Summarize all sections and extract structured information.
+        
+        Same results as summarize_all_sections_async() followed by
+        extract_structured_info_async(), but extraction starts as soon as
+        the sections it reads are summarized, overlapping the rest. Its
+        call is not queued behind the remaining chunks, so it may briefly
+        run on top of ``concurrency``.
+        
+        Args:
+            sections: Dictionary of sections
+            preamble: Text before first section (often contains abstract)
+            concurrency: Maximum simultaneous LLM requests
+            failures: If given, the names of sections and fields that fell
+                back to placeholder output are appended to it
+            
+        Returns:
+            Tuple of (section summaries, structured information)
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        tasks = self._start_sections(sections, semaphore)
+        
+        try:
+            summaries = await self._collect_summaries(
+                {name: task for name, task in tasks.items() if name in _EXTRACTION_SOURCES},
+                failures
+            )
+            structured_info = await self.extract_structured_info_async(
+                sections, summaries, preamble, failures
+            )
+            summaries.update(await self._collect_summaries(
+                {name: task for name, task in tasks.items() if name not in summaries},
+                failures
+            ))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        
+        return {name: summaries[name] for name in sections}, structured_info
+    
+    def _start_sections(
+        self,
+        sections: Dict[str, Section],
+        semaphore: asyncio.Semaphore
+    ) -> Dict[str, asyncio.Task]:
+        """Schedule every section's summary as a task."""
+        return {
+            name: asyncio.ensure_future(self.summarize_section_async(section, semaphore))
+            for name, section in sections.items()
+        }
+    
+    async def _collect_summaries(
+        self,
+        tasks: Dict[str, asyncio.Task],
+        failures: Optional[List[str]] = None
+    ) -> Dict[str, str]:
+        """
+        Await section tasks, replacing failed summaries with an error note
+        (and recording the section in ``failures`` when given).
+        """
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        summaries = {}
+        for name, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error summarizing section {name}: {result}")
                 # Continue with other sections
-                summaries[name] = f"[Error summarizing section: {str(e)[:100]}]"
+                summaries[name] = f"[Error summarizing section: {str(result)[:100]}]"
+                if failures is not None:
+                    failures.append(name)
+            elif isinstance(result, BaseException):
+                raise result  # Cancellation, KeyboardInterrupt
+            else:
+                summaries[name] = result
         
         return summaries
     
@@ -164,6 +459,8 @@ class MapReduceSummarizer:
         """
         Extract structured information for final summary.
         
+        Blocking wrapper around extract_structured_info_async().
+        
         Args:
             sections: Original sections
             section_summaries: Section summaries
@@ -172,36 +469,93 @@ class MapReduceSummarizer:
         Returns:
             Dictionary with structured information
         """
-        result = {}
+        return self.llm.run_sync(
+            self.extract_structured_info_async(sections, section_summaries, preamble)
+        )
+    
+    async def extract_structured_info_async(
+        self,
+        sections: Dict[str, Section],
+        section_summaries: Dict[str, str],
+        preamble: str = "",
+        failures: Optional[List[str]] = None
+    ) -> dict:
+        """
+        Extract structured information.
         
-        # Extract key findings
-        if 'results' in section_summaries:
-            try:
-                findings = self._extract_findings(section_summaries['results'])
-                result['key_findings'] = findings
-            except Exception as e:
-                logger.error(f"Error extracting findings: {e}")
-                result['key_findings'] = [section_summaries['results']]
+        When the source texts fit in one call, findings, limitations and
+        conclusions are extracted together with a single JSON request;
+        otherwise (or if that response is unusable) each is extracted by
+        its own call, all running concurrently.
         
-        # Extract limitations
+        Args:
+            sections: Original sections
+            section_summaries: Section summaries
+            preamble: Text before first section (often contains abstract)
+            failures: If given, fields whose extraction failed (and so hold
+                a fallback value) are appended to it
+            
+        Returns:
+            Dictionary with structured information
+        """
+        # Choose the source text for each field first
+        results_text = section_summaries.get('results', "")
         limitations_text = self._get_limitations_text(sections, section_summaries)
-        if limitations_text:
+        conclusion_text = self._get_conclusion_text(sections, section_summaries)
+        sources = {
+            field: text
+            for field, text in (
+                ('key_findings', results_text),
+                ('limitations', limitations_text),
+                ('author_conclusions', conclusion_text),
+            )
+            if text
+        }
+        
+        if len(sources) > 1 and self._fits_one_call(sources.values()):
             try:
-                limitations = self._extract_limitations(limitations_text)
-                result['limitations'] = limitations
+                return await self._extract_combined(sources)
             except Exception as e:
-                logger.error(f"Error extracting limitations: {e}")
-                result['limitations'] = []
+                logger.warning(f"Combined extraction failed ({e}); extracting fields separately")
+        
+        # Otherwise issue all the (independent) extraction calls at once.
+        # field -> (label, extraction, value used if it fails)
+        tasks = {}
+        
+        # Extract key findings
+        if 'key_findings' in sources:
+            tasks['key_findings'] = (
+                'findings', self._extract_findings(results_text), [results_text]
+            )
+        
+        # Extract limitations
+        if 'limitations' in sources:
+            tasks['limitations'] = (
+                'limitations', self._extract_limitations(limitations_text), []
+            )
         
         # Extract conclusions
-        conclusion_text = self._get_conclusion_text(sections, section_summaries)
-        if conclusion_text:
-            try:
-                conclusions = self._extract_conclusions(conclusion_text)
-                result['author_conclusions'] = conclusions
-            except Exception as e:
-                logger.error(f"Error extracting conclusions: {e}")
-                result['author_conclusions'] = ""
+        if 'author_conclusions' in sources:
+            tasks['author_conclusions'] = (
+                'conclusions', self._extract_conclusions(conclusion_text), ""
+            )
+        
+        values = await asyncio.gather(
+            *(extraction for _, extraction, _ in tasks.values()),
+            return_exceptions=True
+        )
+        
+        result = {}
+        for (field, (label, _, fallback)), value in zip(tasks.items(), values):
+            if isinstance(value, Exception):
+                logger.error(f"Error extracting {label}: {value}")
+                result[field] = fallback
+                if failures is not None:
+                    failures.append(field)
+            elif isinstance(value, BaseException):
+                raise value  # Cancellation, KeyboardInterrupt
+            else:
+                result[field] = value
         
         return result
     
@@ -229,11 +583,66 @@ class MapReduceSummarizer:
             return summaries['discussion']
         return ""
     
-    def _extract_findings(self, results_text: str) -> List[str]:
+    def _fits_one_call(self, texts) -> bool:
+        """Whether the texts together fit the source-text budget of one call."""
+        budget = self.llm.max_tokens * _INPUT_SHARE
+        total = 0
+        for text in texts:
+            total += self.chunker.count_tokens(text)
+            if total > budget:
+                return False
+        return True
+    
+    async def _extract_combined(self, sources: Dict[str, str]) -> dict:
+        """
+        Extract findings, limitations and conclusions with one LLM call.
+        
+        Args:
+            sources: Source text for each requested field
+            
+        Returns:
+            Value for each requested field
+            
+        Raises:
+            ValueError: If the response is not valid JSON or lacks a field
+            ValidationError: If a field has the wrong type
+        """
+        prompt = prompts.get_combined_extraction_prompt(
+            results_text=sources.get('key_findings', ""),
+            limitations_text=sources.get('limitations', ""),
+            conclusion_text=sources.get('author_conclusions', "")
+        )
+        
+        def parse(response: str) -> dict:
+            return self._parse_combined(response, list(sources))
+        
+        return parse(await self.llm.complete_async(
+            prompt=prompt,
+            system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
+            temperature=0.1,
+            json_mode=True,
+            validate=parse
+        ))
+    
+    def _parse_combined(self, response: str, fields: List[str]) -> dict:
+        """Parse a combined extraction response, requiring every field."""
+        parsed = _CombinedExtraction.model_validate(
+            self.llm.parse_json_response(response)
+        )
+        
+        result = {}
+        for field in fields:
+            value = getattr(parsed, field)
+            if value is None:
+                raise ValueError(f"response has no {field}")
+            result[field] = value.strip() if isinstance(value, str) else value
+        return result
+    
+    async def _extract_findings(self, results_text: str) -> List[str]:
         """Extract key findings as list."""
         prompt = prompts.get_findings_prompt(results_text)
         
-        response = self.llm.complete(
+        response = await self.llm.complete_async(
             prompt=prompt,
             system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
             temperature=0.1,
@@ -247,11 +656,11 @@ class MapReduceSummarizer:
         else:
             return [str(findings)]
     
-    def _extract_limitations(self, text: str) -> List[str]:
+    async def _extract_limitations(self, text: str) -> List[str]:
         """Extract limitations as list."""
         prompt = prompts.get_limitations_prompt(text)
         
-        response = self.llm.complete(
+        response = await self.llm.complete_async(
             prompt=prompt,
             system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
             temperature=0.1,
@@ -265,11 +674,11 @@ class MapReduceSummarizer:
         else:
             return []
     
-    def _extract_conclusions(self, text: str) -> str:
+    async def _extract_conclusions(self, text: str) -> str:
         """Extract author conclusions."""
         prompt = prompts.get_conclusions_prompt(text)
         
-        response = self.llm.complete(
+        response = await self.llm.complete_async(
             prompt=prompt,
             system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
             temperature=0.2
@@ -1,6 +1,11 @@
 """
 Prompt templates for medical paper summarization.
 """
+import functools
+import string
+from typing import List, Optional, Tuple
+
+_FORMATTER = string.Formatter()
 
 
 class PromptTemplates:
@@ -37,6 +42,22 @@ TEXT:
 
 SUMMARY:"""
     
+    # Batched chunk summarization (map phase, several chunks per call)
+    BATCH_CHUNK_SUMMARY_PROMPT = """Summarize each of the following {num_chunks} excerpts from the {section_name} section of a medical research paper. The excerpts are separated by "### CHUNK n ###" markers.
+
+INSTRUCTIONS:
+- Summarize every excerpt separately, in order
+- Extract key information relevant to a {section_name} section
+- Preserve ALL numerical values, statistics, and measurements exactly
+- Keep technical terminology
+- Be concise but comprehensive
+- Do not add interpretation
+
+{chunks}
+
+Respond with a JSON object containing exactly {num_chunks} summaries, one per excerpt, in order:
+{{"summaries": ["Summary of chunk 1", "Summary of chunk 2", ...]}}"""
+    
     # Section synthesis (reduce phase)
     SECTION_SYNTHESIS_PROMPT = """You have {num_chunks} summaries from different parts of the {section_name} section. Combine them into a coherent summary.
 
@@ -104,6 +125,31 @@ DISCUSSION/CONCLUSION:
 
 AUTHOR CONCLUSIONS (1-2 sentences):"""
     
+    # Extract findings, limitations and conclusions in one call
+    COMBINED_EXTRACTION_PROMPT = """Extract the key findings, the study limitations and the authors' conclusions from the following parts of a medical research paper.
+
+CRITICAL:
+- key_findings: list each distinct finding from the RESULTS separately, with EXACT numerical values (means, SDs, p-values, CIs, effect sizes) and sample sizes if reported; include both positive and negative/null results; do not interpret or explain results
+- limitations: list each limitation explicitly mentioned in the LIMITATIONS TEXT separately
+- author_conclusions: the authors' stated conclusions from the DISCUSSION/CONCLUSION in 1-2 sentences, preserving their hedging language (e.g., "suggests", "may indicate") and important caveats; do not infer or interpret
+- If a part is not available or mentions nothing relevant, use [] (or "" for author_conclusions)
+
+RESULTS:
+{results_text}
+
+LIMITATIONS TEXT:
+{limitations_text}
+
+DISCUSSION/CONCLUSION:
+{conclusion_text}
+
+Respond with a JSON object following this structure:
+{{
+  "key_findings": ["Finding 1 with exact numbers", ...],
+  "limitations": ["Limitation 1", ...],
+  "author_conclusions": "Authors' stated conclusions"
+}}"""
+    
     # Extract keywords
     KEYWORDS_PROMPT = """Extract 5-8 key medical/scientific terms from this paper.
 
@@ -148,17 +194,65 @@ Respond with a JSON object following this structure:
 CRITICAL: Preserve all numerical values exactly. Do not add any findings or conclusions not present in the source text."""
 
 
+@functools.lru_cache(maxsize=32)
+def _template_parts(template: str) -> Optional[Tuple[Tuple[str, Optional[str]], ...]]:
+    """
+    Split a template into (literal text, field name) pairs, once per template.
+    
+    Keyed on the template string itself, so templates replaced at runtime
+    (see EXTENSIONS.md) are picked up. Returns None for templates using
+    conversions, format specs, or fields that are not plain names (``{}``,
+    ``{0}``, ``{x.y}``, ``{x[0]}``), which are left to str.format.
+    """
+    parts = []
+    for literal, field, spec, conversion in _FORMATTER.parse(template):
+        if spec or conversion or (field is not None and not field.isidentifier()):
+            return None
+        parts.append((literal, field))
+    return tuple(parts)
+
+
+def _render(template: str, **values) -> str:
+    """Fill a template like str.format, without re-parsing it on every call."""
+    parts = _template_parts(template)
+    if parts is None:
+        return template.format(**values)
+    
+    pieces = []
+    for literal, field in parts:
+        pieces.append(literal)
+        if field is not None:
+            pieces.append(str(values[field]))
+    return ''.join(pieces)
+
+
 def get_chunk_summary_prompt(section_name: str, chunk_text: str) -> str:
     """Get prompt for chunk summarization."""
-    return PromptTemplates.CHUNK_SUMMARY_PROMPT.format(
+    return _render(
+        PromptTemplates.CHUNK_SUMMARY_PROMPT,
         section_name=section_name,
         chunk_text=chunk_text
     )
 
 
+def get_batch_chunk_summary_prompt(section_name: str, chunk_texts: List[str]) -> str:
+    """Get prompt for summarizing several chunks in one call."""
+    chunks = "\n\n".join(
+        f"### CHUNK {i} ###\n\n{text}"
+        for i, text in enumerate(chunk_texts, 1)
+    )
+    return _render(
+        PromptTemplates.BATCH_CHUNK_SUMMARY_PROMPT,
+        num_chunks=len(chunk_texts),
+        section_name=section_name,
+        chunks=chunks
+    )
+
+
 def get_section_synthesis_prompt(section_name: str, chunk_summaries: str, num_chunks: int) -> str:
     """Get prompt for section synthesis."""
-    return PromptTemplates.SECTION_SYNTHESIS_PROMPT.format(
+    return _render(
+        PromptTemplates.SECTION_SYNTHESIS_PROMPT,
         section_name=section_name,
         chunk_summaries=chunk_summaries,
         num_chunks=num_chunks
@@ -167,26 +261,41 @@ def get_section_synthesis_prompt(section_name: str, chunk_summaries: str, num_ch
 
 def get_findings_prompt(results_text: str) -> str:
     """Get prompt for findings extraction."""
-    return PromptTemplates.FINDINGS_PROMPT.format(results_text=results_text)
+    return _render(PromptTemplates.FINDINGS_PROMPT, results_text=results_text)
 
 
 def get_limitations_prompt(text: str) -> str:
     """Get prompt for limitations extraction."""
-    return PromptTemplates.LIMITATIONS_PROMPT.format(text=text)
+    return _render(PromptTemplates.LIMITATIONS_PROMPT, text=text)
 
 
 def get_conclusions_prompt(conclusion_text: str) -> str:
     """Get prompt for conclusions extraction."""
-    return PromptTemplates.CONCLUSIONS_PROMPT.format(conclusion_text=conclusion_text)
+    return _render(PromptTemplates.CONCLUSIONS_PROMPT, conclusion_text=conclusion_text)
+
+
+def get_combined_extraction_prompt(
+    results_text: str,
+    limitations_text: str,
+    conclusion_text: str
+) -> str:
+    """Get prompt for extracting findings, limitations and conclusions at once."""
+    return _render(
+        PromptTemplates.COMBINED_EXTRACTION_PROMPT,
+        results_text=results_text or "Not available.",
+        limitations_text=limitations_text or "Not available.",
+        conclusion_text=conclusion_text or "Not available."
+    )
 
 
 def get_keywords_prompt(text: str) -> str:
     """Get prompt for keyword extraction."""
-    return PromptTemplates.KEYWORDS_PROMPT.format(text=text)
+    return _render(PromptTemplates.KEYWORDS_PROMPT, text=text)
 
 
 def get_final_synthesis_prompt(section_summaries: str) -> str:
     """Get prompt for final synthesis."""
-    return PromptTemplates.FINAL_SYNTHESIS_PROMPT.format(
+    return _render(
+        PromptTemplates.FINAL_SYNTHESIS_PROMPT,
         section_summaries=section_summaries
     )
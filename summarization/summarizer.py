@@ -1,15 +1,18 @@
 """
 Main paper summarizer orchestrator.
 """
+import asyncio
+import sqlite3
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 
 from ingestion.pdf_loader import PDFLoader, TextCleaner
 from ingestion.xml_loader import XMLLoader
-from processing.section_parser import SectionParser
+from processing.section_parser import Section, SectionParser
 from processing.chunker import TextChunker
 from summarization.llm_client import LLMClient
+from summarization.llm_cache import LLMResponseCache
 from summarization.map_reduce import MapReduceSummarizer
 from summarization import prompts
 from output.schema import PaperSummary
@@ -22,6 +25,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _open_cache() -> Optional[LLMResponseCache]:
+    """Open the on-disk response cache, or run without one if that fails."""
+    try:
+        return LLMResponseCache()
+    except (OSError, sqlite3.Error, ValueError) as e:
+        logger.warning(f"LLM response cache unavailable, continuing without it: {e}")
+        return None
+
+
 class MedicalPaperSummarizer:
     """Main orchestrator for medical paper summarization."""
     
@@ -30,7 +42,9 @@ class MedicalPaperSummarizer:
         primary_model: Optional[str] = None,
         fallback_model: Optional[str] = None,
         chunk_size: Optional[int] = None,
-        chunk_overlap: Optional[int] = None
+        chunk_overlap: Optional[int] = None,
+        marshal_k: int = 1,
+        use_cache: bool = False
     ):
         """
         Initialize summarizer.
@@ -40,6 +54,8 @@ class MedicalPaperSummarizer:
             fallback_model: Fallback LLM model
             chunk_size: Text chunk size in tokens
             chunk_overlap: Overlap between chunks in tokens
+            marshal_k: Chunks packed into each map-phase LLM call
+            use_cache: Reuse LLM responses stored on disk by earlier runs
         """
         # Initialize components
         self.pdf_loader = PDFLoader(use_pymupdf=True)
@@ -56,18 +72,21 @@ class MedicalPaperSummarizer:
             primary_model=primary_model,
             fallback_model=fallback_model,
             temperature=settings.temperature,
-            max_tokens=settings.max_tokens
+            max_tokens=settings.max_tokens,
+            cache=_open_cache() if use_cache else None
         )
         
         self.map_reduce = MapReduceSummarizer(
             llm_client=self.llm,
-            chunker=self.chunker
+            chunker=self.chunker,
+            marshal_k=marshal_k
         )
     
     def summarize(
         self,
         file_path: str,
-        title: Optional[str] = None
+        title: Optional[str] = None,
+        file_type: Optional[str] = None
     ) -> PaperSummary:
         """
         Summarize a medical research paper.
@@ -75,6 +94,38 @@ class MedicalPaperSummarizer:
         Args:
             file_path: Path to PDF or XML file
             title: Optional paper title (auto-extracted if not provided)
+            file_type: 'pdf' or 'xml' if already known (default: from suffix)
+            
+        Returns:
+            PaperSummary object
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If file format is unsupported or processing fails
+        """
+        return self.llm.run_sync(
+            self.summarize_async(file_path, title=title, file_type=file_type)
+        )
+    
+    async def summarize_async(
+        self,
+        file_path: str,
+        title: Optional[str] = None,
+        concurrency: int = 4,
+        file_type: Optional[str] = None
+    ) -> PaperSummary:
+        """
+        Summarize a paper with concurrent LLM calls.
+        
+        Same pipeline and result as ``summarize``; the section summaries
+        issue up to ``concurrency`` requests at once, while keyword
+        extraction runs alongside them.
+        
+        Args:
+            file_path: Path to PDF or XML file
+            title: Optional paper title (auto-extracted if not provided)
+            concurrency: Maximum simultaneous LLM requests
+            file_type: 'pdf' or 'xml' if already known (default: from suffix)
             
         Returns:
             PaperSummary object
@@ -84,9 +135,90 @@ class MedicalPaperSummarizer:
             ValueError: If file format is unsupported or processing fails
         """
         logger.info(f"Starting summarization of: {file_path}")
+        cleaned_text, sections = await asyncio.to_thread(
+            self._prepare, file_path, file_type
+        )
+        return await self._summarize_sections(cleaned_text, sections, title, concurrency)
+    
+    async def summarize_bytes_async(
+        self,
+        data: bytes,
+        title: Optional[str] = None,
+        concurrency: int = 4
+    ) -> PaperSummary:
+        """
+        Summarize a PDF held in memory, e.g. a web upload.
+        
+        Same pipeline and result as ``summarize_async`` without writing the
+        document to disk first.
+        
+        Args:
+            data: PDF file contents
+            title: Optional paper title (auto-extracted if not provided)
+            concurrency: Maximum simultaneous LLM requests
+            
+        Returns:
+            PaperSummary object
+            
+        Raises:
+            ValueError: If the PDF is unreadable or processing fails
+        """
+        logger.info(f"Starting summarization of in-memory PDF ({len(data)} bytes)")
+        cleaned_text, sections = await asyncio.to_thread(self._prepare_bytes, data)
+        return await self._summarize_sections(cleaned_text, sections, title, concurrency)
+    
+    async def _summarize_sections(
+        self,
+        cleaned_text: str,
+        sections: Dict[str, Section],
+        title: Optional[str],
+        concurrency: int
+    ) -> PaperSummary:
+        """Run the LLM steps on a prepared document (steps 4-8)."""
+        # Steps whose LLM call failed and fell back to placeholder output
+        failures = []
         
+        # Keywords only need the cleaned text: extract them while the
+        # sections are summarized instead of afterwards
+        keywords_task = asyncio.create_task(
+            self._extract_keywords(cleaned_text, failures=failures)
+        )
+        
+        try:
+            # Steps 4-5: Summarize sections using map-reduce, extracting
+            # structured information once the sections it needs are done
+            logger.info(f"Starting section summarization (concurrency={concurrency})...")
+            _, structured_info = await self.map_reduce.summarize_and_extract_async(
+                sections, concurrency=concurrency, failures=failures
+            )
+        except BaseException:
+            keywords_task.cancel()
+            raise
+        
+        # Step 7: Extract keywords
+        keywords = await keywords_task
+        
+        summary = self._build_summary(cleaned_text, structured_info, keywords, title)
+        if failures:
+            logger.warning(f"Summary is incomplete; failed steps: {failures}")
+            summary.mark_failed_steps(failures)
+        return summary
+    
+    def _prepare(
+        self,
+        file_path: str,
+        file_type: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Section]]:
+        """Load, clean and section a document (steps 1-3)."""
         # Step 1: Load document
-        text = self._load_document(file_path)
+        return self._process_text(self._load_document(file_path, file_type))
+    
+    def _prepare_bytes(self, data: bytes) -> Tuple[str, Dict[str, Section]]:
+        """Load, clean and section an in-memory PDF (steps 1-3)."""
+        return self._process_text(self.pdf_loader.load_bytes(data))
+    
+    def _process_text(self, text: str) -> Tuple[str, Dict[str, Section]]:
+        """Clean and section extracted text (steps 2-3)."""
         logger.info(f"Loaded document: {len(text)} characters")
         
         # Step 2: Clean text
@@ -106,28 +238,22 @@ class MedicalPaperSummarizer:
         if not self.section_parser.validate_sections(sections):
             logger.warning("Document structure may be incomplete")
         
-        # Step 4: Summarize sections using map-reduce
-        logger.info("Starting section summarization...")
-        section_summaries = self.map_reduce.summarize_all_sections(sections)
-        
-        # Step 5: Extract structured information
-        logger.info("Extracting structured information...")
-        preamble = self._get_preamble(cleaned_text, sections)
-        structured_info = self.map_reduce.extract_structured_info(
-            sections,
-            section_summaries,
-            preamble=preamble
-        )
-        
+        return cleaned_text, sections
+    
+    def _build_summary(
+        self,
+        cleaned_text: str,
+        structured_info: dict,
+        keywords: list,
+        title: Optional[str]
+    ) -> PaperSummary:
+        """Resolve the title and assemble the summary (steps 6 and 8)."""
         # Step 6: Extract title if not provided
         if not title:
             title = self.text_cleaner.extract_title(cleaned_text)
             if not title:
                 title = "Untitled Paper"
         
-        # Step 7: Extract keywords
-        keywords = self._extract_keywords(cleaned_text)
-        
         # Step 8: Build final summary
         summary = PaperSummary(
             title=title,
@@ -141,12 +267,13 @@ class MedicalPaperSummarizer:
         logger.info("Summarization complete!")
         return summary
     
-    def _load_document(self, file_path: str) -> str:
+    def _load_document(self, file_path: str, file_type: Optional[str] = None) -> str:
         """
         Load document from PDF or XML.
         
         Args:
             file_path: Path to file
+            file_type: 'pdf' or 'xml'; inferred from the suffix if None
             
         Returns:
             Extracted text
@@ -155,36 +282,32 @@ class MedicalPaperSummarizer:
             FileNotFoundError: If file doesn't exist
             ValueError: If format is unsupported
         """
-        path = Path(file_path)
-        suffix = path.suffix.lower()
+        kind = file_type or Path(file_path).suffix.lower().lstrip('.')
         
-        if suffix == '.pdf':
+        if kind == 'pdf':
             return self.pdf_loader.load(file_path)
-        elif suffix == '.xml':
+        elif kind == 'xml':
             return self.xml_loader.load(file_path)
         else:
             raise ValueError(
-                f"Unsupported file format: {suffix}. "
+                f"Unsupported file format: {kind}. "
                 "Supported formats: .pdf, .xml"
             )
     
-    def _get_preamble(self, cleaned_text: str, sections: dict) -> str:
-        """Get text before first section (often contains abstract for numbered-format papers)."""
-        if not sections or 'full_text' in sections:
-            return ""
-        first_start = min(s.start_index for s in sections.values())
-        if first_start <= 0:
-            return ""
-        preamble = cleaned_text[:first_start].strip()
-        return self.chunker.truncate_to_tokens(preamble, 1500)
-    
-    def _extract_keywords(self, text: str, max_tokens: int = 2000) -> list:
+    async def _extract_keywords(
+        self,
+        text: str,
+        max_tokens: int = 2000,
+        failures: Optional[List[str]] = None
+    ) -> list:
         """
         Extract keywords from paper.
         
         Args:
             text: Paper text
             max_tokens: Maximum tokens to analyze
+            failures: If given, 'keywords' is appended to it when the
+                extraction call fails
             
         Returns:
             List of keywords
@@ -195,7 +318,7 @@ class MedicalPaperSummarizer:
         try:
             prompt = prompts.get_keywords_prompt(truncated)
             
-            response = self.llm.complete(
+            response = await self.llm.complete_async(
                 prompt=prompt,
                 system_prompt=prompts.PromptTemplates.SYSTEM_PROMPT,
                 temperature=0.1,
@@ -210,6 +333,8 @@ class MedicalPaperSummarizer:
                 return []
         except Exception as e:
             logger.error(f"Error extracting keywords: {e}")
+            if failures is not None:
+                failures.append('keywords')
             return []
     
     def get_processing_stats(self) -> dict:
@@ -5,9 +5,14 @@ import pytest
 from pathlib import Path
 
 from ingestion.pdf_loader import TextCleaner
+from ingestion.xml_loader import XMLLoader
+from ingestion.batch_loader import BatchLoader
 from processing.section_parser import SectionParser, Section
-from processing.chunker import TextChunker
+from processing.chunker import Chunk, TextChunker
 from output.schema import PaperSummary
+from summarization.llm_cache import LLMResponseCache
+from summarization.llm_client import LLMClient
+from summarization.map_reduce import MapReduceSummarizer
 
 
 class TestTextCleaner:
@@ -42,7 +47,14 @@ class TestTextCleaner:
         cleaned = cleaner.clean(text, remove_citations=True)
         assert "[1,2,3]" not in cleaned
         assert "finding" in cleaned
-
+    
+    def test_normalize_pdf_artifacts(self):
+        """Test ligatures and special spaces are normalized, superscripts kept."""
+        cleaner = TextCleaner()
+        text = "Signi\ufb01cant e\ufb00ect:\u00a0p\u2009<\u20090.05, 10\u2079 cells/m\u00b2 over\u00adall"
+        cleaned = cleaner.clean(text)
+        assert cleaned == "Significant effect: p < 0.05, 10\u2079 cells/m\u00b2 overall"
+    
     def test_extract_title_skips_authors(self):
         """Test that title extraction skips author lines."""
         cleaner = TextCleaner()
@@ -59,6 +71,58 @@ Correspondence should be addressed to Xiaojuan Han.
         assert "In Vitro" in title or "Bioactivity" in title or "RGD" in title
 
 
+class TestXMLLoader:
+    """Tests for XMLLoader."""
+    
+    def test_load_with_metadata(self, tmp_path):
+        """Test text and metadata come from one pass, skipping xrefs."""
+        xml_file = tmp_path / "article.xml"
+        xml_file.write_text("""<?xml version="1.0"?>
+<article><front><article-meta>
+<article-id pub-id-type="doi">10.1000/xyz</article-id>
+<title-group><article-title>Effect of <italic>Drug X</italic></article-title></title-group>
+<abstract><p>Short abstract.</p></abstract>
+<kwd-group><kwd>diabetes</kwd></kwd-group>
+</article-meta></front>
+<body><sec><title>Methods</title><p>We enrolled <xref>1</xref>200 patients.</p></sec></body>
+<back><ref-list><ref><article-title>Cited work</article-title></ref></ref-list></back>
+</article>""")
+
+        text, metadata = XMLLoader().load_with_metadata(str(xml_file))
+        
+        assert "TITLE: Effect of Drug X" in text
+        assert "METHODS" in text
+        assert "We enrolled 200 patients." in text
+        assert metadata['title'] == "Effect of Drug X"
+        assert metadata['doi'] == "10.1000/xyz"
+        assert metadata['keywords'] == ["diabetes"]
+
+
+class TestBatchLoader:
+    """Tests for BatchLoader."""
+    
+    def test_load_many_collects_errors(self, tmp_path):
+        """Test results keep input order and failures don't stop the batch."""
+        xml_file = tmp_path / "article.xml"
+        xml_file.write_text(
+            "<article><body><sec><title>Methods</title>"
+            "<p>We enrolled 200 patients.</p></sec></body></article>"
+        )
+        missing = str(tmp_path / "missing.pdf")
+        calls = []
+        
+        with BatchLoader(workers=1) as loader:
+            results = list(loader.load_many(
+                [missing, str(xml_file)],
+                progress=lambda done, total: calls.append((done, total))
+            ))
+        
+        assert [path for path, _ in results] == [missing, str(xml_file)]
+        assert isinstance(results[0][1], FileNotFoundError)
+        assert "We enrolled 200 patients." in results[1][1]
+        assert calls == [(1, 2), (2, 2)]
+
+
 class TestSectionParser:
     """Tests for SectionParser."""
     
@@ -119,7 +183,28 @@ class TestSectionParser:
         assert 'conclusion' in sections
         assert 'This is the introduction' in sections['introduction'].content
         assert '1. Introduction' not in sections['introduction'].content
-
+    
+    def test_custom_header_patterns(self):
+        """Test patterns added by a subclass are detected."""
+        class FundingParser(SectionParser):
+            HEADER_PATTERNS = {
+                **SectionParser.HEADER_PATTERNS,
+                'funding': [r'\bFUNDING\b'],
+            }
+        
+        text = """
+        METHODS
+        This is the methods.
+        
+        FUNDING
+        Supported by a grant.
+        """
+        
+        assert 'funding' not in SectionParser().parse(text)
+        sections = FundingParser().parse(text)
+        assert sections['funding'].content == "Supported by a grant."
+        assert 'grant' not in sections['methods'].content
+    
     def test_validate_sections(self):
         """Test section validation."""
         parser = SectionParser()
@@ -234,7 +319,288 @@ class TestPaperSummary:
         assert "# Test Paper" in markdown
         assert "## Key Findings" in markdown
         assert "⚠️" in markdown  # Safety disclaimer
+        assert summary.to_markdown() is markdown  # Rendered once
+    
+    def test_model_copy_renders_updated_markdown(self):
+        """Test a copy with updated fields does not reuse cached markdown."""
+        summary = PaperSummary(
+            title="Old Title",
+            key_findings=["Finding 1"],
+            author_conclusions="Conclusions"
+        )
+        summary.to_markdown()
+        
+        updated = summary.model_copy(update={'title': "New Title"})
+        
+        assert updated.to_markdown().startswith("# New Title")
+        assert summary.to_markdown().startswith("# Old Title")
+
+
+
+class TestLLMResponseCache:
+    """Tests for LLMResponseCache."""
+    
+    def test_roundtrip_persists(self, tmp_path):
+        """Test responses survive reopening the cache."""
+        cache = LLMResponseCache(cache_dir=str(tmp_path))
+        key = cache.make_key("claude-x", 0.2, "system", "prompt")
+        
+        assert cache.get(key) is None
+        cache.set(key, "response")
+        cache.close()
+        
+        reopened = LLMResponseCache(cache_dir=str(tmp_path))
+        assert reopened.get(key) == "response"
+        reopened.close()
+    
+    def test_prunes_least_recently_used(self, tmp_path, monkeypatch):
+        """Test the cache keeps only the most recently used max_entries."""
+        from summarization import llm_cache
+        
+        # Let every hit refresh its use time (normally at most once a day)
+        monkeypatch.setattr(llm_cache, "_TOUCH_INTERVAL", 0)
+        cache = LLMResponseCache(cache_dir=str(tmp_path), max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # Now more recent than "b"
+        cache.set("c", "3")
+        cache.close()
+        
+        reopened = LLMResponseCache(cache_dir=str(tmp_path), max_entries=2)
+        assert [reopened.get(k) for k in ("a", "b", "c")] == ["1", None, "3"]
+        reopened.close()
+    
+    def test_key_depends_on_all_parts(self):
+        """Test keys differ when any request parameter differs."""
+        base = LLMResponseCache.make_key("claude-x", 0.2, "prompt")
+        
+        assert base == LLMResponseCache.make_key("claude-x", 0.2, "prompt")
+        assert base != LLMResponseCache.make_key("claude-x", 0.1, "prompt")
+        assert base != LLMResponseCache.make_key("claude-y", 0.2, "prompt")
+        assert LLMResponseCache.make_key("ab", "c") != LLMResponseCache.make_key("a", "bc")
+
+
+class TestLLMClient:
+    """Tests for LLMClient."""
+    
+    def test_complete_many_bounded_and_ordered(self):
+        """Test concurrent completions keep input order and respect the limit."""
+        import asyncio
+        from types import SimpleNamespace
+        
+        state = {"in_flight": 0, "peak": 0}
+        
+        async def create(**kwargs):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            text = kwargs["messages"][0]["content"].upper()
+            return SimpleNamespace(content=[SimpleNamespace(text=text)])
+        
+        client = LLMClient(primary_model="claude-x", fallback_model=None)
+        client.async_anthropic_client = SimpleNamespace(
+            messages=SimpleNamespace(create=create)
+        )
+        
+        prompts = [f"chunk {i}" for i in range(10)]
+        responses = asyncio.run(client.complete_many(prompts, concurrency=3))
+        
+        assert responses == [p.upper() for p in prompts]
+        assert state["peak"] == 3
+    
+    def test_no_cache_bypasses_cache(self, tmp_path):
+        """Test no_cache calls neither read nor fill the response cache."""
+        import asyncio
+        from types import SimpleNamespace
+        
+        calls = []
+        
+        async def create(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(content=[SimpleNamespace(text=f"r{len(calls)}")])
+        
+        cache = LLMResponseCache(cache_dir=str(tmp_path))
+        client = LLMClient(primary_model="claude-x", fallback_model=None, cache=cache)
+        client.async_anthropic_client = SimpleNamespace(
+            messages=SimpleNamespace(create=create)
+        )
+        
+        assert asyncio.run(client.complete_async("p")) == "r1"
+        assert asyncio.run(client.complete_async("p")) == "r1"  # Cached
+        assert asyncio.run(client.complete_async("p", no_cache=True)) == "r2"
+        assert asyncio.run(client.complete_async("q", no_cache=True)) == "r3"
+        assert asyncio.run(client.complete_async("q")) == "r4"  # Not stored
+        assert len(calls) == 4
+        cache.close()
+    
+    def test_bad_json_is_not_replayed(self, tmp_path):
+        """Test JSON-mode replies are only cached once they parse and validate."""
+        import asyncio
+        from types import SimpleNamespace
+        
+        replies = ['{"summaries": ["a"', '["a"]', '["a", "b"]', '["a", "b"]']
+        
+        async def create(**kwargs):
+            return SimpleNamespace(content=[SimpleNamespace(text=replies.pop(0))])
+        
+        def two_items(response):
+            if len(client.parse_json_response(response)) != 2:
+                raise ValueError("expected 2 items")
+        
+        cache = LLMResponseCache(cache_dir=str(tmp_path))
+        client = LLMClient(primary_model="claude-x", fallback_model=None, cache=cache)
+        client.async_anthropic_client = SimpleNamespace(
+            messages=SimpleNamespace(create=create)
+        )
+        
+        # Truncated JSON is returned to the caller but not stored
+        first = asyncio.run(client.complete_async("p", json_mode=True))
+        assert first == '{"summaries": ["a"'
+        # Rejected by the caller's check: raises and is not stored
+        with pytest.raises(ValueError):
+            asyncio.run(client.complete_async("p", json_mode=True, validate=two_items))
+        for _ in range(2):
+            response = asyncio.run(
+                client.complete_async("p", json_mode=True, validate=two_items)
+            )
+            assert response == '["a", "b"]'
+        assert replies == ['["a", "b"]']  # Last call was a cache hit
+        cache.close()
+    
+    def test_retry_delay_is_capped(self):
+        """Test Retry-After and backoff waits never exceed max_retry_delay."""
+        from types import SimpleNamespace
+        from config import settings
+        
+        client = LLMClient(primary_model="claude-x", fallback_model=None)
+        
+        def throttled(retry_after):
+            return SimpleNamespace(response=SimpleNamespace(headers={"retry-after": retry_after}))
+        
+        assert client._retry_delay(1, throttled("2")) == 2.0
+        assert client._retry_delay(1, throttled("3600")) == settings.max_retry_delay
+        assert client._retry_delay(20, None) <= settings.max_retry_delay
+
 
+class TestMapReduceSummarizer:
+    """Tests for MapReduceSummarizer."""
+    
+    def test_batches_respect_count_and_token_budget(self):
+        """Test map-phase batches hold at most marshal_k chunks within budget."""
+        llm = LLMClient(primary_model="claude-x", fallback_model=None, max_tokens=1000)
+        summarizer = MapReduceSummarizer(llm, chunker=None, marshal_k=3)
+        # Budget is 700 tokens of chunk text per call
+        chunks = [
+            Chunk(text=f"c{i}", start_char=0, end_char=0, token_count=tokens, chunk_index=i)
+            for i, tokens in enumerate([100, 100, 100, 100, 400, 400, 900, 50])
+        ]
+        
+        batches = summarizer._batches(chunks)
+        
+        assert [[c.chunk_index for c in batch] for batch in batches] == [
+            [0, 1, 2], [3, 4], [5], [6], [7]
+        ]
+    
+    def test_reduce_skips_near_identical_summaries(self):
+        """Test the reduce call is skipped only for repeated summaries."""
+        import asyncio
+        
+        llm = LLMClient(primary_model="claude-x", fallback_model=None)
+        summarizer = MapReduceSummarizer(llm, chunker=None)
+        
+        async def combine(section_name, summaries):
+            return "combined"
+        
+        summarizer._combine_summaries = combine
+        base = "Patients were randomized to drug or placebo and followed for 12 months in total"
+        longer = base + " overall"
+        
+        def reduce(summaries):
+            return asyncio.run(summarizer._reduce("methods", summaries))
+        
+        assert reduce([base, longer]) == longer
+        # A number only in the shorter summary must not be dropped
+        assert reduce([base + " (n=40)", longer]) == "combined"
+        assert reduce([base, "Outcomes were assessed by MRI"]) == "combined"
+    
+    def test_extract_structured_info_combines_fields(self):
+        """Test findings, limitations and conclusions come from one call."""
+        import asyncio
+        from types import SimpleNamespace
+        
+        calls = []
+        
+        async def create(**kwargs):
+            calls.append(kwargs)
+            text = (
+                '{"key_findings": ["HR 0.8 (95% CI 0.7-0.9)"], '
+                '"limitations": ["Small sample"], '
+                '"author_conclusions": " May reduce risk. "}'
+            )
+            return SimpleNamespace(content=[SimpleNamespace(text=text)])
+        
+        llm = LLMClient(primary_model="claude-x", fallback_model=None)
+        llm.async_anthropic_client = SimpleNamespace(
+            messages=SimpleNamespace(create=create)
+        )
+        summarizer = MapReduceSummarizer(llm, chunker=SimpleNamespace(count_tokens=len))
+        
+        info = asyncio.run(summarizer.extract_structured_info_async(
+            sections={},
+            section_summaries={'results': 'Results text', 'discussion': 'Discussion text'}
+        ))
+        
+        assert len(calls) == 1
+        assert info == {
+            'key_findings': ["HR 0.8 (95% CI 0.7-0.9)"],
+            'limitations': ["Small sample"],
+            'author_conclusions': "May reduce risk.",
+        }
+    
+    def test_zero_concurrency_runs_sequentially(self):
+        """Test a concurrency below 1 is clamped instead of blocking forever."""
+        import asyncio
+        
+        summarizer = MapReduceSummarizer(llm_client=None, chunker=None)
+        
+        async def summarize_section_async(section, semaphore, max_chunks=20):
+            async with semaphore:
+                return f"summary of {section}"
+        
+        summarizer.summarize_section_async = summarize_section_async
+        
+        async def run():
+            return await asyncio.wait_for(
+                summarizer.summarize_all_sections_async({'methods': 'm'}, concurrency=0),
+                timeout=5
+            )
+        
+        assert asyncio.run(run()) == {'methods': "summary of m"}
+    
+    def test_failed_sections_are_reported(self):
+        """Test a failed section gets a placeholder and is recorded as failed."""
+        import asyncio
+        
+        summarizer = MapReduceSummarizer(llm_client=None, chunker=None)
+        
+        async def ok():
+            return "Methods summary"
+        
+        async def fail():
+            raise RuntimeError("rate limited")
+        
+        async def collect():
+            tasks = {'methods': asyncio.ensure_future(ok()),
+                     'results': asyncio.ensure_future(fail())}
+            failures = []
+            return await summarizer._collect_summaries(tasks, failures), failures
+        
+        summaries, failures = asyncio.run(collect())
+        
+        assert summaries['methods'] == "Methods summary"
+        assert summaries['results'].startswith("[Error summarizing section")
+        assert failures == ['results']
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -4,6 +4,7 @@ System validation and health check script.
 
 Run this to verify installation and configuration.
 """
+import os
 import sys
 from pathlib import Path
 import importlib.util
@@ -29,7 +30,7 @@ def check_dependencies():
         'openai',
         'pdfplumber',
         'fitz',  # PyMuPDF
-        'bs4',  # beautifulsoup4
+        'lxml',
         'tiktoken',
         'pydantic',
         'dotenv'
@@ -108,17 +109,20 @@ def check_structure():
     
     all_good = True
     
+    # One directory listing instead of a stat per path
+    with os.scandir('.') as it:
+        entries = {entry.name: entry for entry in it}
+    
     for dirname in required_dirs:
-        path = Path(dirname)
-        if path.exists() and path.is_dir():
+        entry = entries.get(dirname)
+        if entry is not None and entry.is_dir():
             print(f"✓ {dirname}/ directory")
         else:
             print(f"✗ {dirname}/ directory missing")
             all_good = False
     
     for filename in required_files:
-        path = Path(filename)
-        if path.exists():
+        if filename in entries:
             print(f"✓ {filename}")
         else:
             print(f"✗ {filename} missing")
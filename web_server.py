@@ -2,17 +2,66 @@
 Web UI for Medical Paper Summarizer.
 Run with: python web_server.py
 """
+import asyncio
+import functools
+import hashlib
+import logging
+import os
 import tempfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, File, HTTPException, Request, Response, UploadFile
+from fastapi.responses import HTMLResponse, JSONResponse
+from pydantic_core import to_json
 
 from summarization.summarizer import MedicalPaperSummarizer
 
-app = FastAPI(title="Medical Paper Summarizer", version="1.0")
+logger = logging.getLogger(__name__)
 
-# Create summarizer on startup (lazy init to avoid loading before API keys checked)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the summarizer up before the server accepts requests."""
+    _warm_up()
+    yield
+
+
+app = FastAPI(title="Medical Paper Summarizer", version="1.0", lifespan=lifespan)
+
+
+def _env_positive_int(name: str, default: int) -> int:
+    """Read a positive integer setting, failing at startup on bad values."""
+    value = os.environ.get(name, str(default))
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    return number
+
+
+# Uploads are copied out of Starlette's spooled form data in pieces of this
+# size. Those up to _IN_MEMORY_UPLOAD_BYTES are summarized from memory;
+# larger ones go to a temp file so long PDFs can still be extracted in
+# parallel. Requests declaring a body over _MAX_UPLOAD_BYTES are refused
+# before it is read; chunked ones are only checked while being copied
+_UPLOAD_CHUNK_BYTES = 1 << 20
+_IN_MEMORY_UPLOAD_BYTES = 16 << 20
+_MAX_UPLOAD_BYTES = _env_positive_int("MAX_UPLOAD_MB", 50) << 20
+
+# Serialized /summarize responses for recently seen uploads, keyed by
+# (model, content hash) so a model change is never served stale results
+_RESULT_CACHE_SIZE = 128
+_results: "OrderedDict[tuple[str, bytes], bytes]" = OrderedDict()
+
+# Summaries run at once per process; each already issues several LLM calls,
+# so later uploads wait here instead of pushing the provider into 429s
+_summary_slots = asyncio.Semaphore(_env_positive_int("MAX_CONCURRENT_SUMMARIES", 4))
+
+# Created at startup by _warm_up(), or on first use if that failed
 _summarizer: MedicalPaperSummarizer | None = None
 
 
@@ -24,17 +73,153 @@ def get_summarizer() -> MedicalPaperSummarizer:
     return _summarizer
 
 
+def _warm_up() -> None:
+    """
+    Pay one-time set-up costs at startup instead of on the first request.
+
+    Builds the summarizer (tokenizer load included) and imports the LLM
+    SDKs by creating the async clients. Failures are only logged: the
+    server still starts, and the first request retries and reports them.
+    """
+    try:
+        summarizer = get_summarizer()
+        summarizer.chunker.count_tokens("warm up")
+        summarizer.llm.async_anthropic_client
+        summarizer.llm.async_openai_client
+    except Exception as e:
+        logger.warning(f"Summarizer warm-up failed, deferring to first request: {e}")
+
+
+async def _receive_upload(
+    file: UploadFile,
+) -> tuple[bytes | None, str | None, bytes]:
+    """
+    Read and hash an upload piece by piece, enforcing the size limit.
+
+    Returns (contents, None, digest) for uploads that fit in memory,
+    otherwise (None, path, digest) with a temp file the caller must delete.
+    """
+    pieces: list[bytes] = []
+    size = 0
+    tmp = None
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+            size += len(chunk)
+            if size > _MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large (limit {_MAX_UPLOAD_BYTES >> 20} MB).",
+                )
+            # File writes block (and may stall on a slow disk): run them in
+            # worker threads so the loop keeps serving other requests
+            if tmp is None and size > _IN_MEMORY_UPLOAD_BYTES:
+                tmp = await asyncio.to_thread(
+                    tempfile.NamedTemporaryFile, delete=False, suffix=".pdf"
+                )
+                await asyncio.to_thread(tmp.writelines, pieces)
+                pieces.clear()
+            if tmp is None:
+                pieces.append(chunk)
+            else:
+                await asyncio.to_thread(tmp.write, chunk)
+    except BaseException:
+        if tmp is not None:
+            await asyncio.to_thread(_discard_temp, tmp)
+        raise
+
+    if tmp is None:
+        return b"".join(pieces), None, digest.digest()
+    await asyncio.to_thread(tmp.close)
+    return None, tmp.name, digest.digest()
+
+
+def _discard_temp(tmp) -> None:
+    """Close and delete a partially written upload."""
+    tmp.close()
+    Path(tmp.name).unlink(missing_ok=True)
+
+
+def _cached_result(key: tuple[str, bytes]) -> bytes | None:
+    """Look up a cached response, marking it most recently used."""
+    content = _results.get(key)
+    if content is not None:
+        _results.move_to_end(key)
+    return content
+
+
+def _cache_result(key: tuple[str, bytes], content: bytes) -> None:
+    """Store a response, evicting the least recently used beyond the cap."""
+    _results[key] = content
+    _results.move_to_end(key)
+    while len(_results) > _RESULT_CACHE_SIZE:
+        _results.popitem(last=False)
+
+
+async def _summarize_to_json(
+    summarizer: MedicalPaperSummarizer, data: bytes | None, path: str | None
+) -> tuple[bytes, bool]:
+    """
+    Summarize an upload received by _receive_upload() into response JSON.
+
+    Returns the JSON and whether it may be cached: summaries where an LLM
+    step fell back to placeholder text (e.g. during a provider outage) are
+    not, so a retry of the same upload gets a fresh attempt.
+    """
+    # Await the native async pipeline: LLM calls run on the client's own
+    # loop and parsing in a worker thread, so this loop stays free to
+    # serve other requests (and /health) meanwhile
+    if data is not None:
+        summary = await summarizer.summarize_bytes_async(data)
+    else:
+        summary = await summarizer.summarize_async(path)
+    # Serialized by pydantic-core in one pass (same bytes as returning
+    # the dict, without jsonable_encoder walking it first)
+    content = to_json({
+        "markdown": summary.to_markdown(),
+        "title": summary.title,
+        "json": summary,
+    })
+    return content, not summary.failed_steps
+
+
 @app.get("/health")
 async def health():
     """Health check for deployment platforms."""
     return {"status": "ok"}
 
 
+@functools.lru_cache(maxsize=1)
+def _index_page() -> tuple[bytes, str]:
+    """The UI page and its ETag, read from disk once."""
+    html = (Path(__file__).parent / "static" / "index.html").read_bytes()
+    return html, f'"{hashlib.blake2b(html, digest_size=16).hexdigest()}"'
+
+
 @app.get("/", response_class=HTMLResponse)
-async def index():
+async def index(request: Request):
     """Serve the main UI."""
-    html_path = Path(__file__).parent / "static" / "index.html"
-    return html_path.read_text(encoding="utf-8")
+    html, etag = _index_page()
+    # Browsers revalidate each load and get an empty 304 while it is current
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(html, headers=headers)
+
+
+@app.middleware("http")
+async def _reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads whose declared size is over the limit, unread."""
+    if request.method == "POST" and request.url.path == "/summarize":
+        # Allow for the multipart boundaries and headers around the file
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > _MAX_UPLOAD_BYTES + (64 << 10):
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File too large (limit {_MAX_UPLOAD_BYTES >> 20} MB)."},
+            )
+    return await call_next(request)
 
 
 @app.post("/summarize")
@@ -52,28 +237,32 @@ async def summarize_paper(file: UploadFile = File(...)):
             detail="Only PDF files are supported. Please upload a .pdf file.",
         )
 
-    # Save uploaded file to temp location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    data, tmp_path, digest = await _receive_upload(file)
 
     try:
         summarizer = get_summarizer()
-        summary = summarizer.summarize(tmp_path)
-        return {
-            "markdown": summary.to_markdown(),
-            "title": summary.title,
-            "json": summary.model_dump(mode="json"),
-        }
+        # Re-uploads of the same paper (retries, demos) skip the pipeline
+        key = (summarizer.llm.primary_model, digest)
+        content = _cached_result(key)
+        if content is None:
+            async with _summary_slots:
+                # The same paper may have finished while this one waited
+                content = _cached_result(key)
+                if content is None:
+                    content, cacheable = await _summarize_to_json(
+                        summarizer, data, tmp_path
+                    )
+                    if cacheable:
+                        _cache_result(key, content)
+        return Response(content=content, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        Path(tmp_path).unlink(missing_ok=True)
+        if tmp_path is not None:
+            Path(tmp_path).unlink(missing_ok=True)
 
 
 def main():
-    import os
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)